@@ -6,7 +6,7 @@ from typing import Optional, Tuple, TYPE_CHECKING
 # from engine import Engine
 # from entity import Entity
 
-from entity import Actor
+from entity import Actor, Item
 import util
 import colors
 import exceptions
@@ -32,12 +32,35 @@ class Action:
         Perform this action with the objects needed to determine its scope.
         -self.engine is the scope this action is being performed in.
         -self.entity is the object performing the action.
-        -This method must be overridden by Action subclasses.
+        -This method must be overridden by Action subclasses, or validate and execute instead.
         """
+        reason = self.validate()
+        if reason is not None:
+            raise exceptions.Impossible(reason)
+        self.execute()
+
+    def validate(self) -> Optional[str]:
+        """
+        Return the reason this action is impossible to perform now, or None if it's possible.
+        Nothing is changed, so the AIs check their actions with it instead of catching Impossible.
+        """
+        return None
+
+    def can_perform(self) -> bool:
+        """ Return True if this action is possible to perform now. """
+        return self.validate() is None
+
+    def execute(self) -> None:
+        """ Perform this action, validate() has passed. """
         raise NotImplementedError()
 
 class TakeStairsAction(Action):
-    def perform(self) -> None:
+    def validate(self) -> Optional[str]:
+        if (self.entity.x, self.entity.y) not in (self.engine.game_map.upstairs_location, self.engine.game_map.endswitch_location):
+            return "There are no stairs here."
+        return None
+
+    def execute(self) -> None:
         """
         Take the stairs, if any exist at the entity's location.
         """
@@ -55,8 +78,6 @@ class TakeStairsAction(Action):
             )
             # End the game here...
             self.engine.station_destroyed = True
-        else:
-            raise exceptions.Impossible("There are no stairs here.")
 
 class ActionWithDirection(Action):
     def __init__(self, entity: Actor, dx: int, dy: int) -> None:
@@ -79,9 +100,6 @@ class ActionWithDirection(Action):
         """Return the actor at this actions destination."""
         return self.engine.game_map.get_actor_at(*self.dest_xy)
 
-    def perform(self) -> None:
-        raise NotImplementedError()
-
 class ItemAction(Action):
     def __init__(self, entity : Actor, item : Item, target_xy: Optional[Tuple[int, int]] = None):
         super().__init__(entity=entity)
@@ -102,16 +120,20 @@ class ItemAction(Action):
 
 class MeleeAction(ActionWithDirection):
     """" Perform Melee(attack) action to an entity in that direction."""
-    def perform(self) -> None:
-        target = self.action_target_actor
+    def validate(self) -> Optional[str]:
         # Check if has target to attack
-        if not target:
-            raise exceptions.Impossible("No target to attack.")
+        if not self.action_target_actor:
+            return "No target to attack."
+        return None
+
+    def execute(self) -> None:
+        target = self.action_target_actor
+        rng = self.engine.game_world.rng.combat
         # Attack hit check.
-        if not util.hit_check(target.fighter.dv, self.entity.fighter.tohit):
+        if not util.hit_check(target.fighter.dv, self.entity.fighter.tohit, rng):
             self.engine.message_log.add_message(f"{self.entity.name.capitalize()} Attack the {target.name} but missed.", fg=colors.enemy_atk)
             return
-        dmg = util.roll_dice(self.entity.fighter.attack_die, self.entity.fighter.attack_roll, self.entity.fighter.attack_damage_bonus)
+        dmg = util.roll_dice(self.entity.fighter.attack_die, self.entity.fighter.attack_roll, self.entity.fighter.attack_damage_bonus, rng)
         
         # limit damage to 0
         dmg = max(dmg-target.equipment.def_bonus, 0)
@@ -132,27 +154,31 @@ class RangedAttackAction(Action):
         self.target_xy = target_xy
         self.target = entity.game_map.get_actor_at(*target_xy)
 
-    def perform(self) -> None:
+    def validate(self) -> Optional[str]:
         if not self.engine.game_map.visible[self.target_xy]:
-            raise exceptions.Impossible("You cannot target an area that you cannot see.")
+            return "You cannot target an area that you cannot see."
         if not self.target:
-            raise exceptions.Impossible("No target to attack at.")
-        target_fighter = self.target.fighter
+            return "No target to attack at."
         # Ammo Check
         if self.entity.fighter.ammo <= 0:
-            raise exceptions.Impossible("You don't have any ammo to shoot.")
+            return "You don't have any ammo to shoot."
+        return None
+
+    def execute(self) -> None:
+        target_fighter = self.target.fighter
         # Reduce the ammo after shooting.
         self.entity.fighter.ammo -= self.entity.fighter.ranged_attack_shot
         self.entity.fighter.ammo = max(0, self.entity.fighter.ammo)
+        rng = self.engine.game_world.rng.combat
         # Attack hit check
-        if not util.hit_check(target_fighter.dv, self.entity.fighter.ranged_tohit):
+        if not util.hit_check(target_fighter.dv, self.entity.fighter.ranged_tohit, rng):
             self.engine.message_log.add_message(f"{self.entity.name.capitalize()} Shoots at the {target_fighter.parent.name} but missed.", fg=colors.enemy_atk)
             return
         dmg = 0
         for _ in range(self.entity.fighter.ranged_attack_shot):
             if self.entity.fighter.ammo <= 0:
                 break
-            temp = util.roll_dice(self.entity.fighter.ranged_attack_die, self.entity.fighter.ranged_attack_roll, self.entity.fighter.ranged_attack_base)
+            temp = util.roll_dice(self.entity.fighter.ranged_attack_die, self.entity.fighter.ranged_attack_roll, self.entity.fighter.ranged_attack_base, rng)
             temp = max(temp, 0)
             dmg += temp
         # limit damage to 0
@@ -168,27 +194,40 @@ class RangedAttackAction(Action):
         getattr(audiobrain, self.entity.fighter.equip_attack_snd_id).play()
 
 class MovementAction(ActionWithDirection):
-    def perform(self) -> None:
-        """ Perform the Movement Action"""
+    def validate(self) -> Optional[str]:
         dest_x, dest_y = self.dest_xy
         if not self.engine.game_map.is_in_bounds(x=dest_x, y=dest_y):
             # Destination is out of bounds, don't move.
-            raise exceptions.Impossible("The Way is blocked.")
+            return "The Way is blocked."
         if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
             # Destination blocked, also don't move.
-            raise exceptions.Impossible("The Way is blocked.")
+            return "The Way is blocked."
         if self.engine.game_map.get_blocking_entity_at(dest_x, dest_y):
             # Destination blocked by an entity, also don't move.
-            raise exceptions.Impossible("The Way is blocked.")
+            return "The Way is blocked."
+        return None
+
+    def execute(self) -> None:
+        """ Perform the Movement Action"""
         self.entity.move(self.dx, self.dy)
         
 class BumpAction(ActionWithDirection):
     """ An Action class to determine if the Action should be Melee or Movement Action """
-    def perform(self) -> None:
+    def resolve(self) -> ActionWithDirection:
+        """ Return the Melee or Movement action this bump turns into. """
         if self.action_target_actor:
-            return MeleeAction(self.entity, self.dx, self.dy).perform()
+            return MeleeAction(self.entity, self.dx, self.dy)
         else:
-            return MovementAction(self.entity, self.dx, self.dy).perform()
+            return MovementAction(self.entity, self.dx, self.dy)
+
+    def perform(self) -> None:
+        return self.resolve().perform()
+
+    def validate(self) -> Optional[str]:
+        return self.resolve().validate()
+
+    def execute(self) -> None:
+        return self.resolve().execute()
     
 class PickUpAction(Action):
     """ Pickup an item and add it to the inventory if there is room for it. """
@@ -200,11 +239,11 @@ class PickUpAction(Action):
         actor_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_x == item.x and actor_y == item.y:
+        for item in self.engine.game_map.get_entities_at(actor_x, actor_y):
+            if isinstance(item, Item):
                 if inventory.total_weight >= inventory.capacity:
                     raise exceptions.Impossible("Your Inventory is full.")
-                self.engine.game_map.entities.remove(item)
+                self.engine.game_map.remove_entity(item)
                 item.parent = self.entity.inventory
                 inventory.items.append(item)
 
@@ -230,6 +269,6 @@ class EquipAction(Action):
 
 class WaitAction(Action):
     """ Just Wait. """
-    def perform(self) -> None:
+    def execute(self) -> None:
         pass
 
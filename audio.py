@@ -1,25 +1,210 @@
-from just_playback import Playback
+from __future__ import annotations
+
+from collections import OrderedDict
+import os
+import queue
+import threading
+import traceback
+from typing import Callable, List, Optional, Set, Tuple, TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from just_playback import Playback
+
+
+class NullPlayback:
+    """ A Playback stand-in that plays nothing, used when running without audio (headless). """
+    active = False
+    paused = False
+    playing = False
+
+    def load_file(self, filename: str) -> None:
+        pass
+
+    def loop_at_end(self, loop: bool) -> None:
+        pass
+
+    def play(self) -> None:
+        pass
+
+    def resume(self) -> None:
+        pass
+
+    def pause(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+# Set ROGUELIKE_NO_AUDIO=1 or call use_null_backend() before the first sound is played to run without sound.
+_null_backend = os.environ.get("ROGUELIKE_NO_AUDIO", "") not in ("", "0")
+
+# Number of sounds kept loaded, past it the least recently used ones that aren't playing are unloaded.
+SOUND_CACHE_SIZE = 8
+# Number of copies of a sound effect that can play at once, past it the oldest one is restarted.
+VOICES = 4
+
+_lock = threading.Lock()
+# The loaded sounds, least recently used first.
+_loaded: OrderedDict[AudioPlayBack, None] = OrderedDict()
+
+# The sounds played since the last new_turn(), they aren't played again until the next one.
+_played_this_turn: Set[AudioPlayBack] = set()
+
+# The calls waiting to be made on the audio thread, and the thread making them.
+_commands: queue.SimpleQueue[Tuple[Callable[..., None], tuple]] = queue.SimpleQueue()
+_dispatcher: Optional[threading.Thread] = None
+
+
+def use_null_backend() -> None:
+    """ Make every sound played from now on silent, without loading any sound file. """
+    global _null_backend
+    _null_backend = True
+
+
+def new_turn() -> None:
+    """ Start a new turn, the sounds already played can be played again. """
+    _played_this_turn.clear()
+
+
+def _dispatch(func: Callable[..., None], *args) -> None:
+    """ Call func on the audio thread, so the game never waits on the audio backend. """
+    global _dispatcher
+    if _null_backend:
+        # Nothing to wait on.
+        func(*args)
+        return
+    if _dispatcher is None:
+        _dispatcher = threading.Thread(target=_run_dispatcher, name="audio", daemon=True)
+        _dispatcher.start()
+    _commands.put((func, args))
+
+
+def _run_dispatcher() -> None:
+    while True:
+        func, args = _commands.get()
+        try:
+            func(*args)
+        except Exception:
+            traceback.print_exc()
+
+
+def _evict(keep: AudioPlayBack) -> None:
+    """ Unload the least recently used sounds over SOUND_CACHE_SIZE, except keep and the ones playing. """
+    for sound in list(_loaded):
+        if len(_loaded) <= SOUND_CACHE_SIZE:
+            return
+        if sound is keep or not sound._voices_lock.acquire(blocking=False):
+            # Kept, or busy on another thread, it's unloaded another time.
+            continue
+        try:
+            if not any(voice.playing for voice in sound._voices):
+                sound._voices = None
+                del _loaded[sound]
+        finally:
+            sound._voices_lock.release()
+
 
 class AudioPlayBack:
-    playback : Playback
-    def __init__(self, filename : str, loop: bool) -> None:
+    """
+    A sound file, only loaded the first time it's used and unloaded once it hasn't been used for a while.
+    A sound effect is loaded up to voices times as it's needed, so it can be heard several times at once.
+    The sound is played, paused and stopped on the audio thread.
+    """
+    # The loaded copies of the sound, the one played last at the end.
+    _voices : Optional[List[Union[Playback, NullPlayback]]] = None
+
+    def __init__(self, filename : str, loop: bool, voices: int = VOICES) -> None:
         """ Create AudioPlayBack"""
-        self.playback = Playback()
-        self.playback.load_file(filename)
-        self.playback.loop_at_end(loop)
+        self.filename = filename
+        self.loop = loop
+        # Music is only ever heard once at a time.
+        self.voices = 1 if loop else voices
+        # Held while the voices are loaded, changed or read, the game, audio and warm up threads all use them.
+        self._voices_lock = threading.Lock()
+
+    def _new_voice(self) -> Union[Playback, NullPlayback]:
+        if _null_backend:
+            playback = NullPlayback()
+        else:
+            from just_playback import Playback
+            playback = Playback()
+        playback.load_file(self.filename)
+        playback.loop_at_end(self.loop)
+        return playback
+
+    def _use(self) -> List[Union[Playback, NullPlayback]]:
+        """ Return the voices of the sound, loading the first one if it isn't loaded, and mark it as used. """
+        with self._voices_lock:
+            voices = self._voices
+            if voices is None:
+                voices = self._voices = [self._new_voice()]
+        with _lock:
+            _loaded[self] = None
+            _loaded.move_to_end(self)
+            _evict(keep=self)
+        return voices
+
+    @property
+    def loaded(self) -> bool:
+        return self._voices is not None
+
+    @property
+    def playing(self) -> bool:
+        """ Whether the voice played last is playing, without loading the sound if it isn't. """
+        with self._voices_lock:
+            return bool(self._voices) and self._voices[-1].playing
+
+    @property
+    def playback(self) -> Union[Playback, NullPlayback]:
+        """ The voice played last, the sound is loaded now if it isn't. """
+        voices = self._use()
+        with self._voices_lock:
+            return voices[-1]
+
+    def load(self) -> None:
+        """ Load the sound now if it isn't, so playing it doesn't have to wait. """
+        self._use()
 
     def play(self):
-        """ play from the beginning. """
-        self.playback.play()
+        """ play from the beginning, at most once a turn (see new_turn) unless it's stopped. """
+        if self in _played_this_turn:
+            return
+        _played_this_turn.add(self)
+        _dispatch(self._play)
 
     def resume(self):
         """ resume playing from paused. """
-        self.playback.resume()
+        _dispatch(self._for_voices, "resume", "paused")
 
     def pause(self):
         """ pause the playback."""
-        self.playback.pause()
+        _dispatch(self._for_voices, "pause", "playing")
 
     def stop(self):
         """ stop the playback"""
-        self.playback.stop()
+        _played_this_turn.discard(self)
+        _dispatch(self._for_voices, "stop", "active")
+
+    def _play(self) -> None:
+        voices = self._use()
+        with self._voices_lock:
+            idle = [voice for voice in voices if not voice.playing]
+            if idle:
+                voice = idle[0]
+                voices.remove(voice)
+            elif len(voices) < self.voices:
+                voice = self._new_voice()
+            else:
+                voice = voices.pop(0)
+            # The voice played last goes at the end.
+            voices.append(voice)
+        voice.play()
+
+    def _for_voices(self, method: str, state: str) -> None:
+        """ Call method on the loaded voices that are in state. """
+        with self._voices_lock:
+            voices = list(self._voices or ())
+        for voice in voices:
+            if getattr(voice, state):
+                getattr(voice, method)()
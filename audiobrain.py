@@ -1,19 +1,63 @@
-"""" Store all the audio reference """
+"""
+Store all the audio reference.
+Sounds are registered by id in SOUNDS and looked up as attributes of this module, audiobrain.punch_1 for
+example. Nothing is loaded until a sound is first played, see audio.AudioPlayBack.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Tuple
 
 import audio
 
-### BGM
-main_bgm = audio.AudioPlayBack("sounds/scifimain.mp3", True)
-
-
-### SFX 
-punch_1 = audio.AudioPlayBack("sounds/sfx_punch.mp3", False)
-explosive_grenade = audio.AudioPlayBack("sounds/sfx_explosive_grenade.mp3", False)
-flash_grenade = audio.AudioPlayBack("sounds/sfx_flash_grenade.mp3", False)
-nano_patch = audio.AudioPlayBack("sounds/sfx_nano_patch.mp3", False)
-ammo_box = audio.AudioPlayBack("sounds/sfx_ammo_box.mp3", False)
-gun_1 = audio.AudioPlayBack("sounds/sfx_gunf1.mp3", False)
-gun_2 = audio.AudioPlayBack("sounds/sfx_gunf2.mp3", False)
-knife_1 = audio.AudioPlayBack("sounds/sfx_knife.mp3", False)
-game_over = audio.AudioPlayBack("sounds/sfx_game_over.mp3", False)
-boom = audio.AudioPlayBack("sounds/sfx_spaceship_explosion.mp3", False)
+# Sound id -> (file, whether it loops).
+SOUNDS: Dict[str, Tuple[str, bool]] = {
+    ### BGM
+    "main_bgm": ("sounds/scifimain.mp3", True),
+
+    ### SFX
+    "punch_1": ("sounds/sfx_punch.mp3", False),
+    "explosive_grenade": ("sounds/sfx_explosive_grenade.mp3", False),
+    "flash_grenade": ("sounds/sfx_flash_grenade.mp3", False),
+    "nano_patch": ("sounds/sfx_nano_patch.mp3", False),
+    "ammo_box": ("sounds/sfx_ammo_box.mp3", False),
+    "gun_1": ("sounds/sfx_gunf1.mp3", False),
+    "gun_2": ("sounds/sfx_gunf2.mp3", False),
+    "knife_1": ("sounds/sfx_knife.mp3", False),
+    "game_over": ("sounds/sfx_game_over.mp3", False),
+    "boom": ("sounds/sfx_spaceship_explosion.mp3", False),
+}
+
+# The sounds heard in the first turns of most games, loaded by warm_up.
+WARM_UP = ("punch_1", "gun_1", "gun_2", "knife_1")
+
+_sounds: Dict[str, audio.AudioPlayBack] = {}
+_sounds_lock = threading.Lock()
+
+
+def get(name: str) -> audio.AudioPlayBack:
+    """ Return the sound registered as name. """
+    with _sounds_lock:
+        sound = _sounds.get(name)
+        if sound is None:
+            filename, loop = SOUNDS[name]
+            sound = _sounds[name] = audio.AudioPlayBack(filename, loop)
+        return sound
+
+
+def __getattr__(name: str) -> audio.AudioPlayBack:
+    if name not in SOUNDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return get(name)
+
+
+def warm_up(names: Iterable[str] = WARM_UP) -> threading.Thread:
+    """ Load the given sounds on a background thread, so the first time they're played doesn't wait for the files. """
+    def load() -> None:
+        for name in names:
+            get(name).load()
+
+    thread = threading.Thread(target=load, name="audio warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,110 @@
+"""
+Save the game every few turns and on each new floor, without holding up the game.
+The snapshot is taken on the main thread by savefile.capture, which is quick, then compressed and written by a
+worker thread. Only the latest snapshot is kept waiting, a newer one replaces it.
+Nothing is saved until enable() is called, so headless runs and benchmarks don't touch the disk.
+savefile is only imported by the first save, so enabling autosave doesn't slow down the start of the game.
+"""
+
+from __future__ import annotations
+
+import threading
+import traceback
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import Engine
+    import savefile
+
+AUTOSAVE_TURNS = 25
+
+# Where and how often to save, None when autosaving is off. The codec is savefile.DEFAULT_CODEC when it's None.
+_filename: Optional[str] = None
+_every = AUTOSAVE_TURNS
+_codec: Optional[str] = None
+
+# The engine being followed, the turns it played since its last save and the floor it was last saved on.
+_engine: Optional[Engine] = None
+_turns = 0
+_floor = 0
+
+_condition = threading.Condition()
+# The snapshot waiting to be written, and whether the worker is writing one.
+_pending: Optional[Tuple[str, Dict[str, savefile.Chunk], str]] = None
+_writing = False
+_worker: Optional[threading.Thread] = None
+
+
+def enable(filename: str, every: int = AUTOSAVE_TURNS, codec: Optional[str] = None) -> None:
+    """ Autosave to filename every given number of turns, and on each new floor. """
+    global _filename, _every, _codec
+    _filename, _every, _codec = filename, every, codec
+
+
+def notify_turn(engine: Engine) -> None:
+    """ Count a turn played by engine, and save it if it's time to. """
+    global _engine, _turns, _floor
+    if _filename is None:
+        return
+    if engine is not _engine:
+        # A new game or a loaded one, it's saved soon enough by the turn count.
+        _engine, _turns, _floor = engine, 0, engine.game_world.current_floor
+    _turns += 1
+    if not engine.player.alive or engine.station_destroyed:
+        # A finished game isn't saved.
+        return
+    if _turns >= _every or engine.game_world.current_floor != _floor:
+        save(engine)
+
+
+def save(engine: Engine) -> None:
+    """ Take a snapshot of engine now, and write it on the worker thread. """
+    global _pending, _worker, _turns, _floor
+    if _filename is None:
+        return
+    import savefile
+
+    snapshot = savefile.capture(engine)
+    _turns, _floor = 0, engine.game_world.current_floor
+    with _condition:
+        _pending = (_filename, snapshot, _codec or savefile.DEFAULT_CODEC)
+        if _worker is None:
+            _worker = threading.Thread(target=_work, name="autosave", daemon=True)
+            _worker.start()
+        _condition.notify_all()
+
+
+def _work() -> None:
+    global _pending, _writing
+    import savefile
+
+    while True:
+        with _condition:
+            while _pending is None:
+                _condition.wait()
+            filename, snapshot, codec = _pending
+            _pending = None
+            _writing = True
+        try:
+            savefile.write(filename, snapshot, codec)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            with _condition:
+                _writing = False
+                _condition.notify_all()
+
+
+def flush() -> None:
+    """ Wait until every snapshot taken so far is written, before saving or deleting the save on the main thread. """
+    with _condition:
+        while _pending is not None or _writing:
+            _condition.wait()
+
+
+def discard() -> None:
+    """ Drop the snapshot waiting to be written, and wait for the one being written. """
+    global _pending
+    with _condition:
+        _pending = None
+    flush()
@@ -0,0 +1,304 @@
+""" Benchmark the turn loop hot paths over generated floors, so regressions show up as numbers. """
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import lzma
+import os
+import pickle
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, TYPE_CHECKING
+
+# Importing headless first keeps every sound file from being loaded.
+import headless
+
+import tcod
+
+from components import ai_component
+import entity_factory
+import input_handlers
+import savefile
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+PHASES = ("player_action", "enemy_turn", "update_fov", "render")
+
+# Prototypes measured by the memory report, a bit of everything found on a floor.
+MEMORY_PROTOTYPES = ("janitor", "security", "item_box", "table", "bandage", "pistol")
+
+
+class PhaseTimer:
+    """ Accumulate the time, and optionally the allocations, spent in each phase of a turn. """
+    def __init__(self, trace_alloc: bool = False):
+        self.trace_alloc = trace_alloc
+        self.time: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.calls: Dict[str, int] = {phase: 0 for phase in PHASES}
+        # Blocks still allocated after the phase, and the highest memory use above the start of the phase.
+        self.blocks: Dict[str, int] = {phase: 0 for phase in PHASES}
+        self.peak: Dict[str, int] = {phase: 0 for phase in PHASES}
+
+    def wrap(self, phase: str, func: Callable) -> Callable:
+        """ Return func wrapped so every call is counted toward phase. """
+        def timed(*args, **kwargs):
+            if self.trace_alloc:
+                tracemalloc.reset_peak()
+                start_memory = tracemalloc.get_traced_memory()[0]
+                start_blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.time[phase] += time.perf_counter() - start
+                self.calls[phase] += 1
+                if self.trace_alloc:
+                    self.blocks[phase] += sys.getallocatedblocks() - start_blocks
+                    self.peak[phase] = max(self.peak[phase], tracemalloc.get_traced_memory()[1] - start_memory)
+        return timed
+
+
+def new_floor(floor: int, seed: int) -> Engine:
+    """ Return a new game whose current map is the given floor, generated from a fixed seed. """
+    engine = headless.new_game(seed)
+    engine.game_world.current_floor = floor - 1
+    engine.game_world.generate_floor()
+    engine.update_fov()
+    return engine
+
+
+def bench_floor(floor: int, seed: int, turns: int, trace_alloc: bool = False) -> Dict[str, object]:
+    """ Play scripted turns on one floor and return the phase timings. """
+    start = time.perf_counter()
+    engine = new_floor(floor, seed)
+    generate_time = time.perf_counter() - start
+
+    timer = PhaseTimer(trace_alloc)
+    handler = input_handlers.MainGameEventHandler(engine)
+    engine.handle_enemy_turn = timer.wrap("enemy_turn", engine.handle_enemy_turn)
+    engine.update_fov = timer.wrap("update_fov", engine.update_fov)
+    render = timer.wrap("render", engine.render)
+    console = tcod.console.Console(96, 54, order="F")
+
+    for stats in (ai_component.path_stats, ai_component.action_stats):
+        for key in stats:
+            stats[key] = 0
+    # The player walks at random and never dies, so every floor plays the same number of turns.
+    moves = random.Random(seed * 1000 + floor)
+    player = engine.player
+    played = 0
+    for _ in range(turns):
+        player.fighter.hp = player.fighter.max_hp
+        action = headless.BumpAction(player, *moves.choice(headless.DIRECTIONS))
+        action.perform = timer.wrap("player_action", action.perform)
+        played += handler.handle_action(action)
+        console.clear()
+        render(console)
+
+    result: Dict[str, object] = {
+        "floor": floor,
+        "turns": played,
+        "entities": len(engine.game_map.entities),
+        # Actors still taking turns at the end, the others sleep out of view.
+        "awake": len(engine.game_map.awake),
+        "generate_ms": generate_time * 1000,
+        "paths_computed": ai_component.path_stats["computed"],
+        "paths_reused": ai_component.path_stats["reused"],
+        "ai_rejected": ai_component.action_stats["rejected"],
+        "ai_raised": ai_component.action_stats["raised"],
+    }
+    for phase in PHASES:
+        result[f"{phase}_us"] = timer.time[phase] / max(timer.calls[phase], 1) * 1e6
+        if trace_alloc:
+            result[f"{phase}_blocks"] = timer.blocks[phase]
+            result[f"{phase}_peak_kib"] = timer.peak[phase] / 1024
+    return result
+
+
+def memory_report(floor: int, seed: int, copies: int = 1000) -> List[Dict[str, object]]:
+    """ Return the bytes taken by one copy of each measured prototype, and per entity of a pickled floor. """
+    results: List[Dict[str, object]] = []
+    # Keep every copy alive until the end, so nothing freed is counted against the next prototype.
+    kept = []
+    tracemalloc.start()
+    for name in MEMORY_PROTOTYPES:
+        prototype = getattr(entity_factory, name)
+        kept.append(prototype.clone())
+        gc.collect()
+        start = tracemalloc.get_traced_memory()[0]
+        kept.append([prototype.clone() for _ in range(copies)])
+        gc.collect()
+        results.append({"entity": name, "bytes": (tracemalloc.get_traced_memory()[0] - start) / copies})
+    tracemalloc.stop()
+    del kept
+
+    game_map = new_floor(floor, seed).game_map
+    entities = len(game_map.entities)
+    # The tiles are the same size whatever the entities are, leave them out.
+    tiles = sum(len(pickle.dumps(array, protocol=pickle.HIGHEST_PROTOCOL)) for array in (game_map.tiles, game_map.visible, game_map.seen))
+    pickled = len(pickle.dumps(game_map, protocol=pickle.HIGHEST_PROTOCOL)) - tiles
+    results.append({"entity": f"floor {floor} pickle ({entities} entities)", "bytes": pickled / entities})
+    return results
+
+
+def save_report(floor: int, seed: int, turns: int, filename: str = "benchmark.sav") -> List[Dict[str, object]]:
+    """
+    Return the save and load times and file size of each codec, for a game played for some turns on the given floor.
+    An incremental save is timed after 10 more turns, the legacy whole-engine LZMA pickle is in the first row.
+    """
+    engine = new_floor(floor, seed)
+    headless.run(engine, headless.BotInput(), turns)
+    results: List[Dict[str, object]] = []
+    try:
+        start = time.perf_counter()
+        data = lzma.compress(pickle.dumps(engine))
+        with open(filename, "wb") as f:
+            f.write(data)
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        savefile.load(filename)
+        results.append({
+            "codec": "legacy lzma", "save_ms": save_time * 1000, "incremental_ms": save_time * 1000,
+            "load_ms": (time.perf_counter() - start) * 1000, "kib": len(data) / 1024,
+        })
+        os.remove(filename)
+
+        for codec in savefile.CODECS:
+            start = time.perf_counter()
+            savefile.save(engine, filename, codec)
+            save_time = time.perf_counter() - start
+            size = os.path.getsize(filename)
+            headless.run(engine, headless.BotInput(), 10)
+            start = time.perf_counter()
+            savefile.save(engine, filename, codec)
+            incremental_time = time.perf_counter() - start
+            start = time.perf_counter()
+            savefile.load(filename)
+            results.append({
+                "codec": codec, "save_ms": save_time * 1000, "incremental_ms": incremental_time * 1000,
+                "load_ms": (time.perf_counter() - start) * 1000, "kib": size / 1024,
+            })
+            os.remove(filename)
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+    return results
+
+
+# Run in a new interpreter by startup_report: everything needed before the main menu is first drawn.
+STARTUP_CODE = """
+import time
+start = time.perf_counter()
+import tcod
+import main
+import setup_game
+tileset = tcod.tileset.load_tilesheet("newtile16x16.png", 16, 16, tcod.tileset.CHARMAP_CP437)
+setup_game.MainMenu().on_render(tcod.console.Console(96, 54, order="F"))
+print(time.perf_counter() - start)
+"""
+
+
+def startup_report() -> Dict[str, object]:
+    """
+    Return the time until the main menu is drawn (without a window) and the import time of each module
+    imported until then, from -X importtime in a new interpreter so nothing is imported already.
+    The menu music is started as in the game, set ROGUELIKE_NO_AUDIO=1 to time it without sound.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=here, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules.append({
+            "module": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            # Modules of the game itself, as opposed to the standard library and dependencies.
+            "game": os.path.exists(os.path.join(here, name.split(".")[0] + ".py"))
+            or name.split(".")[0] == "components",
+        })
+    modules.sort(key=lambda module: module["self_ms"], reverse=True)
+    return {"menu_ms": float(process.stdout.split()[-1]) * 1000, "modules": modules}
+
+
+def print_table(results: List[Dict[str, object]]) -> None:
+    """ Print the results as a table, one row per floor and a total row. """
+    columns = [key for key in results[0] if key != "floor"]
+    print("floor " + " ".join(f"{column:>18}" for column in columns))
+    for row in results:
+        print(f"{row['floor']:>5} " + " ".join(f"{row[column]:>18.1f}" for column in columns))
+    print("  avg " + " ".join(f"{sum(row[column] for row in results) / len(results):>18.1f}" for column in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--floors", type=int, nargs=2, default=(1, 20), metavar=("FIRST", "LAST"))
+    parser.add_argument("--turns", type=int, default=200, help="turns played on each floor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--alloc", action="store_true", help="also count allocations (slower, skews the timings)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--memory", action="store_true", help="report the memory used per entity instead of timings")
+    parser.add_argument("--save", action="store_true", help="report the save and load times of each codec instead")
+    parser.add_argument("--startup", action="store_true", help="report the import time of each module before the menu")
+    args = parser.parse_args()
+
+    if args.startup:
+        report = startup_report()
+        if args.json:
+            print(json.dumps(report, indent=1))
+            return
+        modules = report["modules"]
+        game = [module for module in modules if module["game"]]
+        sound = "without sound" if os.environ.get("ROGUELIKE_NO_AUDIO", "") not in ("", "0") else "with sound"
+        print(f"main menu drawn after {report['menu_ms']:.1f} ms {sound}, {len(modules)} modules imported")
+        print(f"{'module':>32} {'self_ms':>10} {'cumulative_ms':>14}")
+        for module in [module for module in modules if not module["game"]][:15] + game:
+            print(f"{('* ' if module['game'] else '') + module['module']:>32} "
+                  f"{module['self_ms']:>10.1f} {module['cumulative_ms']:>14.1f}")
+        print(f"{'* game modules':>32} {sum(module['self_ms'] for module in game):>10.1f}")
+        return
+
+    if args.save:
+        results = save_report(args.floors[1], args.seed, args.turns)
+        if args.json:
+            print(json.dumps(results, indent=1))
+        else:
+            print(f"{'codec':>12} " + " ".join(f"{column:>15}" for column in list(results[0])[1:]))
+            for row in results:
+                print(f"{row['codec']:>12} " + " ".join(f"{value:>15.1f}" for value in list(row.values())[1:]))
+        return
+
+    if args.memory:
+        results = memory_report(args.floors[1], args.seed)
+        if args.json:
+            print(json.dumps(results, indent=1))
+        else:
+            for row in results:
+                print(f"{row['entity']:>32} {row['bytes']:>10.1f} bytes")
+        return
+
+    if args.alloc:
+        tracemalloc.start()
+    results = [
+        bench_floor(floor, args.seed, args.turns, args.alloc)
+        for floor in range(args.floors[0], args.floors[1] + 1)
+    ]
+    if args.json:
+        print(json.dumps(results, indent=1))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
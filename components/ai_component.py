@@ -2,8 +2,7 @@
 
 from __future__ import annotations
 
-import random
-from typing import List, Optional, Tuple, TYPE_CHECKING
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np
 import tcod
@@ -14,78 +13,156 @@ from actions import Action, BumpAction, MeleeAction, MovementAction, WaitAction,
 if TYPE_CHECKING:
    from entity import Actor
 
+# Number of paths computed by the AIs, and of turns a path was reused instead, reported by the benchmark.
+path_stats: Dict[str, int] = {"computed": 0, "reused": 0}
+# Number of AI actions that were impossible: turned down by validate(), and raised Impossible anyway (caught by
+# Engine.handle_enemy_turn), reported by the benchmark.
+action_stats: Dict[str, int] = {"rejected": 0, "raised": 0}
+
+class Path:
+    """
+    A route to a target, the (x, y) steps in an array and a cursor on the next step to take.
+    It can be followed as long as the target stays put and the cost of the rest of the route doesn't change,
+    that is nothing was moved onto it, or out of it.
+    """
+    __slots__ = ("steps", "costs", "cursor", "target")
+
+    def __init__(self, steps: np.ndarray, target: Tuple[int, int], cost: Optional[np.ndarray]):
+        self.steps = steps
+        # The movement cost of each step when the path was made, None if it isn't known.
+        self.costs = None if cost is None else cost[steps[:, 0], steps[:, 1]]
+        self.cursor = 0
+        self.target = target
+
+    def __len__(self) -> int:
+        """ Return the number of steps left. """
+        return len(self.steps) - self.cursor
+
+    def pop(self) -> Tuple[int, int]:
+        """ Return the next step and move past it. """
+        x, y = self.steps[self.cursor].tolist()
+        self.cursor += 1
+        return x, y
+
+    def is_valid(self, walker: Actor, target: Tuple[int, int]) -> bool:
+        """ Return True if walker can keep following this path to target. """
+        if target != self.target or not len(self) or self.costs is None:
+            return False
+        x, y = self.steps[self.cursor].tolist()
+        if max(abs(x - walker.x), abs(y - walker.y)) != 1:
+            # The walker didn't take the last step, something was in the way.
+            return False
+        route = self.steps[self.cursor:]
+        return bool((walker.game_map.movement_cost()[route[:, 0], route[:, 1]] == self.costs[self.cursor:]).all())
+
 class BaseAI(Action):
     entity: Actor
+    # The path being followed, if any.
+    path: Optional[Path] = None
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if isinstance(self.path, list):
+            # Saved when paths were lists of steps, the map isn't loaded yet so the costs aren't known.
+            steps = np.array(self.path, dtype=np.intp).reshape(-1, 2)
+            self.path = Path(steps, self.path[-1], None) if self.path else None
 
     def perform(self) -> None:
         raise NotImplementedError()
+
+    def attempt(self, action: Action) -> None:
+        """
+        Perform action if it's possible. The player is told why an action is impossible by the Impossible exception,
+        an AI has no use for the reason, so its actions are checked first instead of raising.
+        """
+        if action.validate() is None:
+            action.execute()
+        else:
+            action_stats["rejected"] += 1
+
+    def is_idle(self) -> bool:
+        """
+        Return True if this AI would do nothing on its next turn unless something changes, then the actor sleeps
+        until it's woken up by coming into view or by a noise, see GameMap.wake.
+        """
+        return False
     
-    def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
-        """ Compute and return a path to destination. Will Return an empty list if can't compute the path. """
-        # Get the walkable array
-        cost = np.array(self.entity.game_map.tiles["walkable"], dtype=np.int8)
-        for entity in self.entity.game_map.entities:
-            # Check the enitiy that blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add the cost of the blocked position
-                # A lower number will make the enemies crowd together
-                # A higher number will make the enemies try to surround the play
-                cost[entity.x, entity.y] += 10
-            # Create a graph from the cost array and pass that graph to a new pathfinder.
-            graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-            pathfinder = tcod.path.Pathfinder(graph)
-            # Add start position
-            pathfinder.add_root((self.entity.x, self.entity.y))
-            # Compute the path and remove the starting position.
-            path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-            return [(index[0], index[1]) for index in path]
+    def get_path_to(self, dest_x: int, dest_y: int) -> Path:
+        """ Compute and return a path to destination. Will Return an empty path if can't compute the path. """
+        path_stats["computed"] += 1
+        target = self.engine.player
+        if (dest_x, dest_y) == (target.x, target.y):
+            # Chasing the player, walk down the distance field shared by every AI this turn.
+            steps = tcod.path.hillclimb2d(self.engine.chase_map, (self.entity.x, self.entity.y), True, True)
+            return Path(steps[1:], (dest_x, dest_y), self.entity.game_map.movement_cost())
+        cost = self.entity.game_map.movement_cost()
+        # Create a graph from the map's cost array and pass that graph to a new pathfinder.
+        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
+        pathfinder = tcod.path.Pathfinder(graph)
+        # Add start position
+        pathfinder.add_root((self.entity.x, self.entity.y))
+        # Compute the path and remove the starting position.
+        return Path(pathfinder.path_to((dest_x, dest_y))[1:], (dest_x, dest_y), cost)
+
+    def path_to(self, dest_x: int, dest_y: int) -> Path:
+        """ Return a path to destination, the one being followed if it's still valid. """
+        if self.path is not None and self.path.is_valid(self.entity, (dest_x, dest_y)):
+            path_stats["reused"] += 1
+            return self.path
+        return self.get_path_to(dest_x, dest_y)
 
 class BlindedEnemy(BaseAI):
     """
-    A blinded enemy will stumble around aimlessly for a given number of turns, then revert back to its previous AI.
+    A blinded enemy will stumble around aimlessly until expire() is called, then revert back to its previous AI.
+    The flash schedules expire() on the GameMap, or the effect lasts for turns_remaining of its own turns if given.
     If an actor occupies a tile it is randomly moving into, it will attack.
     """
 
     def __init__(
-        self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining: int
+        self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining: Optional[int] = None
     ):
         super().__init__(entity)
 
         self.previous_ai = previous_ai
         self.turns_remaining = turns_remaining
 
-    def perform(self) -> None:
-        # Revert the AI back to the original state if the effect has run its course.
-        if self.turns_remaining <= 0:
-            self.engine.message_log.add_message(
-                f"The {self.entity.name} can see again and regains its senses."
-            )
-            self.entity.ai = self.previous_ai
-        else:
-            # Pick a random direction due to blindness
-            direction_x, direction_y = random.choice(
-                [
-                    (-1, -1),  # Northwest
-                    (0, -1),  # North
-                    (1, -1),  # Northeast
-                    (-1, 0),  # West
-                    (1, 0),  # East
-                    (-1, 1),  # Southwest
-                    (0, 1),  # South
-                    (1, 1),  # Southeast
-                ]
-            )
+    def expire(self) -> None:
+        """ Revert the AI back to the original state, the effect has run its course. """
+        if self.entity.ai is not self:
+            # Dead, or its AI was replaced since.
+            return
+        self.engine.message_log.add_message(
+            f"The {self.entity.name} can see again and regains its senses."
+        )
+        self.entity.ai = self.previous_ai
 
+    def perform(self) -> None:
+        if self.turns_remaining is not None:
+            if self.turns_remaining <= 0:
+                return self.expire()
             self.turns_remaining -= 1
-
-            # The blinded actor will either try to move or attack in the chosen random direction.
-            # It may bump into walls or miss an attack due to blindness.
-            return BumpAction(self.entity, direction_x, direction_y,).perform()
+        # Pick a random direction due to blindness
+        direction_x, direction_y = self.engine.game_world.rng.combat.choice(
+            [
+                (-1, -1),  # Northwest
+                (0, -1),  # North
+                (1, -1),  # Northeast
+                (-1, 0),  # West
+                (1, 0),  # East
+                (-1, 1),  # Southwest
+                (0, 1),  # South
+                (1, 1),  # Southeast
+            ]
+        )
+
+        # The blinded actor will either try to move or attack in the chosen random direction.
+        # It may bump into walls or miss an attack due to blindness.
+        return self.attempt(BumpAction(self.entity, direction_x, direction_y,))
 
 class HostileEnemy(BaseAI):
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
-        self.path: List[Tuple[int, int]] = []
+        self.path: Optional[Path] = None
 
     def perform(self) -> None:
         target = self.engine.player
@@ -95,21 +172,25 @@ class HostileEnemy(BaseAI):
         # If close enough to player, Attack the player.
         if self.engine.game_map.visible[self.entity.x, self.entity.y]:
             if distance <= 1:
-                return MeleeAction(self.entity, dx, dy).perform()
-            self.path = self.get_path_to(target.x, target.y)
+                return self.attempt(MeleeAction(self.entity, dx, dy))
+            self.path = self.path_to(target.x, target.y)
         # If Isn't close enough to player, move to player.
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
+            dest_x, dest_y = self.path.pop()
+            return self.attempt(MovementAction(
                 self.entity, dest_x - self.entity.x, dest_y - self.entity.y,
-            ).perform()
+            ))
         # Wait if can't find a path to player
-        return WaitAction(self.entity).perform()
-    
+        return self.attempt(WaitAction(self.entity))
+
+    def is_idle(self) -> bool:
+        """ Out of view with no path to follow, it would only wait. """
+        return not self.path and not self.engine.game_map.visible[self.entity.x, self.entity.y]
+
 class HostileRangedEnemy(BaseAI):
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
-        self.path: List[Tuple[int, int]] = []
+        self.path: Optional[Path] = None
 
     def perform(self) -> None:
         target = self.engine.player
@@ -120,23 +201,27 @@ class HostileRangedEnemy(BaseAI):
         if self.engine.game_map.visible[self.entity.x, self.entity.y]:
             # Shoot if actually have ammo, otherwise just melee attack the enemy.
             if distance <= 1:
-                return MeleeAction(self.entity, dx, dy).perform()
+                return self.attempt(MeleeAction(self.entity, dx, dy))
             elif distance > 4 or not self.entity.fighter.ammo:
-                self.path = self.get_path_to(target.x, target.y) 
+                self.path = self.path_to(target.x, target.y)
             elif self.entity.fighter.ammo >= self.entity.fighter.ranged_attack_shot:
-                return RangedAttackAction(self.entity, target_xy=(target.x, target.y)).perform()
+                return self.attempt(RangedAttackAction(self.entity, target_xy=(target.x, target.y)))
             # self.path = self.get_path_to(target.x, target.y)
         # If Isn't close enough to player, move to player.
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(self.entity, dest_x - self.entity.x, dest_y - self.entity.y,).perform()
+            dest_x, dest_y = self.path.pop()
+            return self.attempt(MovementAction(self.entity, dest_x - self.entity.x, dest_y - self.entity.y,))
         # Wait if can't find a path to player
-        return WaitAction(self.entity).perform()
+        return self.attempt(WaitAction(self.entity))
+
+    def is_idle(self) -> bool:
+        """ Out of view with no path to follow, it would only wait. """
+        return not self.path and not self.engine.game_map.visible[self.entity.x, self.entity.y]
 
 class TurretEnemy(BaseAI):
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
-        self.path: List[Tuple[int, int]] = []
+        self.path: Optional[Path] = None
 
     def perform(self) -> None:
         target = self.engine.player
@@ -146,12 +231,19 @@ class TurretEnemy(BaseAI):
         if self.engine.game_map.visible[self.entity.x, self.entity.y]:
             # Shoot if actually have ammo, otherwise just melee attack the enemy. 
             if self.entity.fighter.ammo >= self.entity.fighter.ranged_attack_shot:
-                return RangedAttackAction(self.entity, target_xy=(target.x, target.y)).perform()
+                return self.attempt(RangedAttackAction(self.entity, target_xy=(target.x, target.y)))
         return
 
+    def is_idle(self) -> bool:
+        """ It only shoots what it can see. """
+        return not self.engine.game_map.visible[self.entity.x, self.entity.y]
+
 class StaticEnemy(BaseAI):
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
-        self.path: List[Tuple[int, int]] = []
+        self.path: Optional[Path] = None
     def perform(self) -> None:
         pass
+
+    def is_idle(self) -> bool:
+        return True
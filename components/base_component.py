@@ -1,15 +1,22 @@
 """ The BaseComponet class where other Componet inherit from. """
 
 from __future__ import annotations
-from typing import TYPE_CHECKING
+
+from typing import TypeVar, TYPE_CHECKING
+
+import util
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
     from game_map import GameMap
 
+T = TypeVar("T", bound="BaseComponent")
+
 class BaseComponent:
     parent : Entity # The parent entity that this component is attacth to.
+    # Subclasses list their own attributes in __slots__, or get a __dict__ when they don't.
+    __slots__ = ("parent",)
 
     @property
     def game_map(self) -> GameMap:
@@ -17,4 +24,16 @@ class BaseComponent:
 
     @property
     def engine(self) -> Engine:
-        return self.game_map.engine
\ No newline at end of file
+        return self.game_map.engine
+
+    def __getstate__(self) -> tuple:
+        return util.get_slot_state(self)
+
+    def __setstate__(self, state) -> None:
+        util.set_slot_state(self, state)
+
+    def clone(self: T, parent: Entity) -> T:
+        """ Return a shallow copy of this component attached to parent. """
+        clone = util.copy_slots(self)
+        clone.parent = parent
+        return clone
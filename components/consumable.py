@@ -19,6 +19,7 @@ if TYPE_CHECKING:
 
 class Consumable(BaseComponent):
     parent : Item
+    __slots__ = ()
 
     def get_action(self, consumer: Actor) -> Optional[ActionOrHandler]:
         """Try to return the action for this item."""
@@ -39,6 +40,8 @@ class Consumable(BaseComponent):
             inventory.items.remove(entity)
 
 class FlashConsumable(Consumable):
+    __slots__ = ("number_of_turns", "radius")
+
     def __init__(self, number_of_turns: int, radius: int):
         self.number_of_turns = number_of_turns
         self.radius = radius
@@ -61,15 +64,20 @@ class FlashConsumable(Consumable):
             raise Impossible("You cannot target an area that you cannot see.")
 
         targets_hit = False
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius and not actor.ai.__class__ in [components.ai_component.StaticEnemy,components.ai_component.TurretEnemy] and actor.name != "Player":
+        for actor in self.engine.game_map.get_actors_in_radius(*target_xy, self.radius):
+            if not actor.ai.__class__ in [components.ai_component.StaticEnemy,components.ai_component.TurretEnemy] and actor.name != "Player":
                 self.engine.message_log.add_message(
                     f"The {actor.name} is blinded by the flash and stumbles around!",
                     colors.status_effect_applied,
                 )
-                actor.ai = components.ai_component.BlindedEnemy(
-                    entity=actor, previous_ai=actor.ai, turns_remaining=self.number_of_turns,
-                )
+                previous_ai = actor.ai
+                if isinstance(previous_ai, components.ai_component.BlindedEnemy):
+                    # Blinded again, the new blindness replaces the old one, whose expiry then does nothing.
+                    previous_ai = previous_ai.previous_ai
+                actor.ai = components.ai_component.BlindedEnemy(entity=actor, previous_ai=previous_ai)
+                self.engine.game_map.schedule_event(self.number_of_turns, actor.ai.expire)
+                # Stumbling around is something to do, even out of view.
+                self.engine.game_map.wake(actor)
                 targets_hit = True
                 audiobrain.flash_grenade.play()
 
@@ -79,6 +87,8 @@ class FlashConsumable(Consumable):
         self.consume()
 
 class ExplosiveConsumable(Consumable):
+    __slots__ = ("damage", "radius")
+
     def __init__(self, damage: int, radius: int):
         self.damage = damage
         self.radius = radius
@@ -101,21 +111,24 @@ class ExplosiveConsumable(Consumable):
             raise Impossible("You cannot target an area that you cannot see.")
 
         targets_hit = False
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                dmg = max(0,self.damage-actor.equipment.def_bonus)
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is caught in the explosion, taking {dmg} damage!"
-                )
-                actor.fighter.take_damage(dmg)
-                targets_hit = True
-                audiobrain.explosive_grenade.play()
+        for actor in self.engine.game_map.get_actors_in_radius(*target_xy, self.radius):
+            dmg = max(0,self.damage-actor.equipment.def_bonus)
+            self.engine.message_log.add_message(
+                f"The {actor.name} is caught in the explosion, taking {dmg} damage!"
+            )
+            actor.fighter.take_damage(dmg)
+            # The noise wakes anyone caught by it.
+            self.engine.game_map.wake(actor)
+            targets_hit = True
+            audiobrain.explosive_grenade.play()
 
         if not targets_hit:
             raise Impossible("There are no targets in the radius.")
         self.consume()
 
 class HealingConsumable(Consumable):
+    __slots__ = ("amount",)
+
     def __init__(self, amount : int):
         self.amount = amount
 
@@ -131,6 +144,8 @@ class HealingConsumable(Consumable):
             raise Impossible(f"Your health is already full.")
 
 class AmmoConsumable(Consumable):
+    __slots__ = ("amount",)
+
     def __init__(self, amount : int):
         self.amount = amount
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, TYPE_CHECKING
+from typing import NamedTuple, Optional, TYPE_CHECKING
 
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
@@ -9,133 +9,119 @@ if TYPE_CHECKING:
     from entity import Actor, Item
 
 
+class EquipmentStats(NamedTuple):
+    """ The stats of everything equipped, summed up. """
+    tohit: int = 0
+    attack_die: int = 0
+    attack_roll: int = 0
+    attack_base: int = 0
+    dv_bonus: int = 0
+    def_bonus: int = 0
+    ranged: bool = False
+    ranged_tohit: int = 0
+    ranged_attack_die: int = 0
+    ranged_attack_roll: int = 0
+    ranged_attack_base: int = 0
+    ranged_attack_shot: int = 0
+    attack_snd_id: str = "punch_1"
+
+
 class Equipment(BaseComponent):
     parent: Actor
+    # stats is rebuilt whenever an item is equipped or removed, so reading a stat is a single lookup.
+    __slots__ = ("weapon", "armor", "stats")
 
     def __init__(self, weapon: Optional[Item] = None, armor: Optional[Item] = None):
         self.weapon = weapon
         self.armor = armor
+        self.update_stats()
+
+    def __setstate__(self, state) -> None:
+        super().__setstate__(state)
+        # Saves from before the stats were cached don't have them.
+        if not hasattr(self, "stats"):
+            self.update_stats()
+
+    def update_stats(self) -> None:
+        """ Sum up the stats of the equipped items. """
+        equipped = [
+            item.equippable for item in (self.weapon, self.armor)
+            if item is not None and item.equippable is not None
+        ]
+        weapon = self.weapon.equippable if self.weapon is not None else None
+        armor = self.armor.equippable if self.armor is not None else None
+        attack_snd_id = "punch_1"
+        if weapon is not None and weapon.atk_snd_id != "":
+            attack_snd_id = weapon.atk_snd_id
+        self.stats = EquipmentStats(
+            tohit=sum(e.tohit for e in equipped),
+            attack_die=sum(e.attack_die for e in equipped),
+            attack_roll=sum(e.attack_roll for e in equipped),
+            attack_base=sum(e.attack_base for e in equipped),
+            dv_bonus=sum(e.dv_bonus for e in equipped),
+            # Only armor protects.
+            def_bonus=armor.defense if armor is not None else 0,
+            # Only the weapon decides if it shoots.
+            ranged=weapon.ranged if weapon is not None else False,
+            ranged_tohit=sum(e.ranged_tohit for e in equipped),
+            ranged_attack_die=sum(e.ranged_attack_die for e in equipped),
+            ranged_attack_roll=sum(e.ranged_attack_roll for e in equipped),
+            ranged_attack_base=sum(e.ranged_attack_base for e in equipped),
+            ranged_attack_shot=sum(e.ranged_attack_shot for e in equipped),
+            attack_snd_id=attack_snd_id,
+        )
 
     @property
     def dv_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.dv_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.dv_bonus
-
-        return bonus
+        return self.stats.dv_bonus
 
     @property
     def def_bonus(self) -> int:
-        bonus = 0
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.defense
-
-        return bonus
+        return self.stats.def_bonus
 
     @property
     def attack_base(self) -> int:
-        base = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            base += self.weapon.equippable.attack_base
-
-        if self.armor is not None and self.armor.equippable is not None:
-            base += self.armor.equippable.attack_base
-
-        return base
+        return self.stats.attack_base
 
     @property
     def ranged_attack_base(self) -> int:
-        base = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            base += self.weapon.equippable.ranged_attack_base
-
-        if self.armor is not None and self.armor.equippable is not None:
-            base += self.armor.equippable.ranged_attack_base
-
-        return base
+        return self.stats.ranged_attack_base
 
     @property 
     def tohit(self) -> int:
-        th = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            th += self.weapon.equippable.tohit
-        if self.armor is not None and self.armor.equippable is not None:
-            th += self.armor.equippable.tohit
-        return th
+        return self.stats.tohit
     
     @property
     def attack_roll(self) -> int:
-        ar = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            ar += self.weapon.equippable.attack_roll
-        if self.armor is not None and self.armor.equippable is not None:
-            ar += self.armor.equippable.attack_roll
-        return ar
+        return self.stats.attack_roll
 
     @property
     def attack_die(self) -> int:
-        ad = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            ad += self.weapon.equippable.attack_die
-        if self.armor is not None and self.armor.equippable is not None:
-            ad += self.armor.equippable.attack_die
-        return ad
+        return self.stats.attack_die
     
     @property
     def ranged(self) -> int:
-        if self.weapon is not None and self.weapon.equippable is not None:
-            return self.weapon.equippable.ranged
-        # if self.armor is not None and self.armor.equippable is not None:
-        #     return True
-        return False
+        return self.stats.ranged
     
     @property
     def ranged_attack_die(self) -> int:
-        ra = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            ra += self.weapon.equippable.ranged_attack_die
-        if self.armor is not None and self.armor.equippable is not None:
-            ra += self.armor.equippable.ranged_attack_die
-        return ra
+        return self.stats.ranged_attack_die
 
     @property
     def ranged_tohit(self) -> int:
-        ad = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            ad += self.weapon.equippable.ranged_tohit
-        if self.armor is not None and self.armor.equippable is not None:
-            ad += self.armor.equippable.ranged_tohit
-        return ad
+        return self.stats.ranged_tohit
 
     @property
     def ranged_attack_roll(self) -> int:
-        ad = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            ad += self.weapon.equippable.ranged_attack_roll
-        if self.armor is not None and self.armor.equippable is not None:
-            ad += self.armor.equippable.ranged_attack_roll
-        return ad
+        return self.stats.ranged_attack_roll
 
     @property
     def ranged_attack_shot(self) -> int:
-        ad = 0
-        if self.weapon is not None and self.weapon.equippable is not None:
-            ad += self.weapon.equippable.ranged_attack_shot
-        if self.armor is not None and self.armor.equippable is not None:
-            ad += self.armor.equippable.ranged_attack_shot
-        return ad
+        return self.stats.ranged_attack_shot
 
     @property
     def attack_snd_id(self) -> str:
-        if self.weapon:
-            if self.weapon.equippable.atk_snd_id != "":
-                return self.weapon.equippable.atk_snd_id
-        return "punch_1"
+        return self.stats.attack_snd_id
 
     def item_is_equipped(self, item: Item) -> bool:
         return self.weapon == item or self.armor == item
@@ -157,6 +143,7 @@ class Equipment(BaseComponent):
             self.unequip_from_slot(slot, add_message)
 
         setattr(self, slot, item)
+        self.update_stats()
 
         if add_message:
             self.equip_message(item.name)
@@ -168,6 +155,7 @@ class Equipment(BaseComponent):
             self.unequip_message(current_item.name)
 
         setattr(self, slot, None)
+        self.update_stats()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
         """ Determine if the equip action will equip or unequip the item. """
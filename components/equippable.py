@@ -13,6 +13,11 @@ if TYPE_CHECKING:
 
 class Equippable(BaseComponent):
     parent: Item
+    __slots__ = (
+        "equipment_type", "tohit", "attack_die", "attack_roll", "attack_base", "dv_bonus",
+        "ranged", "ranged_tohit", "ranged_attack_die", "ranged_attack_roll", "ranged_attack_base",
+        "ranged_attack_shot", "defense", "atk_snd_id",
+    )
 
     def __init__(
         self,
@@ -47,19 +52,27 @@ class Equippable(BaseComponent):
         self.atk_snd_id = atk_snd_id
 
 class Dagger(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.WEAPON, attack_die=1, attack_roll=4, atk_snd_id="knife_1")
 
 
 class Sword(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.WEAPON, attack_die=2, attack_roll=4, atk_snd_id="knife_1")
 
 class Scythe(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.WEAPON, attack_die=4, attack_roll=5, atk_snd_id="knife_1")
 
 class Mop(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -70,23 +83,33 @@ class Mop(Equippable):
             )
 
 class LeatherArmor(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, dv_bonus=2, defense=1)
 
 
 class ChainMail(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, dv_bonus=4, defense=2)
 
 class CombatJumpSuit(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, dv_bonus=6, defense=2)
 
 class CombatArmor(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, dv_bonus=7, defense=3)
 
 class Pistol(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -102,6 +125,8 @@ class Pistol(Equippable):
             )
         
 class SMG(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -117,6 +142,8 @@ class SMG(Equippable):
             )
 
 class CarbineSA(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -132,6 +159,8 @@ class CarbineSA(Equippable):
             )
 
 class CarbineBA(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -147,6 +176,8 @@ class CarbineBA(Equippable):
             )
         
 class RifleAP(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -162,6 +193,8 @@ class RifleAP(Equippable):
             )
 
 class RifleLaser(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -177,6 +210,8 @@ class RifleLaser(Equippable):
             )
    
 class TurretBeam(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -192,6 +227,8 @@ class TurretBeam(Equippable):
             )
         
 class TurretPulse(Equippable):
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(
             equipment_type=EquipmentType.WEAPON, 
@@ -13,16 +13,45 @@ import colors
 if TYPE_CHECKING:
    from entity import Actor
 
+# The speed of an actor acting once a turn, one twice as fast acts twice a turn.
+NORMAL_SPEED = 100
+
 class Fighter(BaseComponent):
     """ A Figther Component class to make Entity able to Fight. """
     parent : Actor  # The parent entity that this component is attacth to.
+    # The stat modifiers are kept up to date by the strength and agility setters.
+    __slots__ = ("max_hp", "_hp", "_strength", "_agility", "strength_mod", "agility_mod", "_ammo", "speed")
 
-    def __init__(self, hp: int, strength: int, agility: int, ammo: int):
+    def __init__(self, hp: int, strength: int, agility: int, ammo: int, speed: int = NORMAL_SPEED):
         self.max_hp = hp
         self._hp = hp
         self.strength = strength
         self.agility = agility
         self._ammo = ammo
+        self.speed = speed
+
+    def __setstate__(self, state) -> None:
+        # Saved before fighters had a speed.
+        self.speed = NORMAL_SPEED
+        super().__setstate__(state)
+
+    @property
+    def strength(self) -> int:
+        return self._strength
+
+    @strength.setter
+    def strength(self, val: int):
+        self._strength = val
+        self.strength_mod = self.get_stat_mods(val)
+
+    @property
+    def agility(self) -> int:
+        return self._agility
+
+    @agility.setter
+    def agility(self, val: int):
+        self._agility = val
+        self.agility_mod = self.get_stat_mods(val)
 
     @property
     def hp(self) -> int:
@@ -53,93 +82,63 @@ class Fighter(BaseComponent):
 
     @property
     def attack_damage_bonus(self) -> int:
-        return self.get_stat_mods(self.strength) + self.equipment_attack_base
+        return self.strength_mod + self.parent.equipment.stats.attack_base
 
     @property
     def tohit(self) -> int:
-        return self.get_stat_mods(self.strength) + self.equipment_tohit
+        return self.strength_mod + self.parent.equipment.stats.tohit
 
     @property
     def dv(self) -> int:
-        return 3 + self.get_stat_mods(self.agility) + self.dv_bonus
+        return 3 + self.agility_mod + self.parent.equipment.stats.dv_bonus
 
     @property
     def attack_die(self) -> int:
-        return self.equipment_attack_die + 1
+        return self.parent.equipment.stats.attack_die + 1
 
     @property
     def attack_roll(self) -> int:
-        return self.equipment_attack_roll + 1
+        return self.parent.equipment.stats.attack_roll + 1
 
     @property
     def dv_bonus(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.dv_bonus
-        else:
-            return 0
+        return self.parent.equipment.stats.dv_bonus
 
     @property
     def equipment_tohit(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.tohit
-        else:
-            return 0
+        return self.parent.equipment.stats.tohit
 
     @property
     def equipment_attack_die(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.attack_die
-        else:
-            return 0
+        return self.parent.equipment.stats.attack_die
 
     @property
     def equipment_attack_roll(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.attack_roll
-        else:
-            return 0
+        return self.parent.equipment.stats.attack_roll
         
     @property
     def equipment_attack_base(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.attack_base
-        else:
-            return 0
+        return self.parent.equipment.stats.attack_base
         
     @property
     def can_ranged_attack(self):
-        if self.parent.equipment:
-            return self.parent.equipment.ranged
-        else:
-            return False
+        return self.parent.equipment.stats.ranged
 
     @property
     def ranged_attack_die(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.ranged_attack_die
-        else:
-            return 0
+        return self.parent.equipment.stats.ranged_attack_die
 
     @property
     def ranged_attack_roll(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.ranged_attack_roll
-        else:
-            return 0
+        return self.parent.equipment.stats.ranged_attack_roll
 
     @property
     def ranged_attack_base(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.ranged_attack_base
-        else:
-            return 0
+        return self.parent.equipment.stats.ranged_attack_base
 
     @property
     def ranged_tohit(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.ranged_tohit
-        else:
-            return 0
+        return self.parent.equipment.stats.ranged_tohit
 
     @property
     def ammo(self) -> int:
@@ -151,14 +150,11 @@ class Fighter(BaseComponent):
 
     @property
     def ranged_attack_shot(self) -> int:
-        if self.parent.equipment:
-            return self.parent.equipment.ranged_attack_shot
-        else:
-            return 0
+        return self.parent.equipment.stats.ranged_attack_shot
         
     @property
     def equip_attack_snd_id(self) -> str:
-        return self.parent.equipment.attack_snd_id
+        return self.parent.equipment.stats.attack_snd_id
     def die(self) -> None:
         if self.engine.player is self.parent:
            death_message = "You died!"
@@ -170,13 +166,13 @@ class Fighter(BaseComponent):
                 death_msg_color = colors.enemy_die
                 from dungen import item_box_drop_item
                 item_box_drop_item(self.parent, self.engine.game_map, self.parent.fighter.ammo)
-                self.engine.game_map.entities.remove(self.parent)
+                self.engine.game_map.remove_entity(self.parent)
                 self.engine.message_log.add_message(death_message, death_msg_color)
                 return
             elif self.parent.name == "Table":
                 death_message = f"{self.parent.name} is destroyed!"
                 death_msg_color = colors.enemy_die
-                self.engine.game_map.entities.remove(self.parent)
+                self.engine.game_map.remove_entity(self.parent)
                 self.engine.message_log.add_message(death_message, death_msg_color)
             else:
                 death_message = f"{self.parent.name} is dead!"
@@ -193,5 +189,7 @@ class Fighter(BaseComponent):
         self.parent.name = f"Corpse of {self.parent.name}"
         self.parent.ai = None
         self.parent.blocks_movement = False
+        self.engine.game_map.update_entity(self.parent)
+        self.engine.game_map.sleep(self.parent)
         self.engine.message_log.add_message(death_message, death_msg_color)
         self.engine.player.level.add_xp(self.parent.level.xp_given)
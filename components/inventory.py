@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 
 from components.base_component import BaseComponent
 
@@ -12,10 +12,17 @@ if TYPE_CHECKING:
 
 class Inventory(BaseComponent):
     parent: Actor
+    __slots__ = ("_capacity", "items")
 
-    def __init__(self, capacity: int = 0, item: List[Item] = []):
+    def __init__(self, capacity: int = 0, item: Optional[List[Item]] = None):
         self._capacity = capacity
-        self.items = item
+        self.items = item if item is not None else []
+
+    def clone(self, parent: Actor) -> Inventory:
+        """ Return a copy of this inventory attached to parent, with its own list of items. """
+        clone = super().clone(parent)
+        clone.items = list(self.items)
+        return clone
 
     def drop(self, item: Item, ) -> None:
         """
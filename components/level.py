@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 class Level(BaseComponent):
     parent: Actor
     total_xp: int
+    __slots__ = ("current_level", "current_xp", "level_up_base", "level_up_factor", "xp_given", "total_xp")
+
     def __init__(
         self,
         current_level: int = 1,
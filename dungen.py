@@ -106,7 +106,7 @@ special_room_attribute: Dict = {
                      (entity_factory.security,(6,4)),(entity_factory.security,(4,6)),(entity_factory.bandage,(5,2)),
                      (entity_factory.security,(6,6))],[(tile_types.wall2,(2,2)),
                      (tile_types.wall2,(8,2)),(tile_types.wall2,(2,8)),(tile_types.wall2,(8,8))]),
-    4: (10,10,10,10,[(entity_factory.security,(5,5)),(entity_factory.bandage,(random.randint(3,8),random.randint(3,4)))],
+    4: (10,10,10,10,[(entity_factory.security,(5,5)),(entity_factory.bandage,(range(3,9),range(3,5)))],
                      [(tile_types.wall2,(2,2)),(tile_types.wall2,(8,2)),(tile_types.wall2,(2,8)),(tile_types.wall2,(8,8))]),
     5: (10,10,10,10,[(entity_factory.sword,(5,5))],[(tile_types.wall2,(2,2)),
                     (tile_types.wall2,(8,2)),(tile_types.wall2,(2,8)),(tile_types.wall2,(8,8))]),
@@ -415,6 +415,7 @@ def get_entities_at_random(
     weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
     number_of_entities: int,
     floor: int,
+    rng: random.Random,
 ) -> List[Entity]:
     entity_weighted_chances = {}
 
@@ -431,12 +432,14 @@ def get_entities_at_random(
     entities = list(entity_weighted_chances.keys())
     entity_weighted_chance_values = list(entity_weighted_chances.values())
 
-    chosen_entities = random.choices(
+    chosen_entities = rng.choices(
         entities, weights=entity_weighted_chance_values, k=number_of_entities
     )
 
     return chosen_entities
 
+WALL2_BYTES = tile_types.wall2.tobytes()
+
 class RectangularRoom:
     """ A Class that define a Rectangular Room For Dungeon Generation"""
     def __init__(self, x: int, y: int, width: int, height: int):
@@ -465,11 +468,11 @@ class RectangularRoom:
         """Return True if this room overlaps with another RectangularRoom."""
         return (self.x1 <= other.x2 and self.x2 >= other.x1 and self.y1 <= other.y2 and self.y2 >= other.y1)
 
-def make_tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+def make_tunnel_between(start: Tuple[int, int], end: Tuple[int, int], rng: random.Random) -> Iterator[Tuple[int, int]]:
     """ Return an L-shaped tunnel between these two points. """
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -483,9 +486,10 @@ def make_tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterato
 
 def item_box_drop_item(entity: Entity, dungeon: GameMap, box_type: int) -> None:
     """Drop random items when item box is destroyed."""
-    
+    rng = dungeon.engine.game_world.rng.loot
+
     #random dropped item
-    items = random.choices(
+    items = rng.choices(
             [value[0] for value in item_box_chance[box_type]],
             weights=[value[1] for value in item_box_chance[box_type]],
             k=1
@@ -495,9 +499,10 @@ def item_box_drop_item(entity: Entity, dungeon: GameMap, box_type: int) -> None:
 
 def entity_drop_item(entity: Entity, dungeon: GameMap, equipment: Equipment, drop_chance: float) -> None:
     """Drop random items when enemy is die."""
+    rng = dungeon.engine.game_world.rng.loot
 
     #return if you unlucky T-T
-    if random.random() > drop_chance:
+    if rng.random() > drop_chance:
         return
     
     items_to_drop = []
@@ -508,86 +513,98 @@ def entity_drop_item(entity: Entity, dungeon: GameMap, equipment: Equipment, dro
 
     #random dropped item
     if items_to_drop:
-        items_to_drop = random.choice(items_to_drop)
+        items_to_drop = rng.choice(items_to_drop)
         items_to_drop.spawn_copy(dungeon, entity.x, entity.y)
 
-def get_chance(floor_number: int, chance_dict: dict) -> bool:
+def is_occupied(dungeon: GameMap, x: int, y: int) -> bool:
+    """ Return True if an entity, or the player start, is at the given location. """
+    return bool(dungeon.get_entities_at(x, y)) or (x, y) == dungeon.player_start
+
+def get_chance(floor_number: int, chance_dict: dict, rng: random.Random) -> bool:
     chance = 0.0
     for floor, prob in chance_dict.items():
         if floor < floor_number:
             chance = prob
         else:
             break
-    return random.random() < chance
+    return rng.random() < chance
 
-ITEM_COUNT = 0
-def place_entities(room : RectangularRoom, dungeon: GameMap, floor_number : int,) -> None:
-    global ITEM_COUNT
-    number_of_monsters = random.randint(
+def place_entities(room : RectangularRoom, dungeon: GameMap, floor_number : int, item_count: int, rng: random.Random) -> int:
+    """ Spawn random monsters and items in the room, return the number of items placed on the floor so far. """
+    number_of_monsters = rng.randint(
         0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
     )
-    number_of_items = random.randint(
+    number_of_items = rng.randint(
         0, get_max_value_for_floor(max_items_by_floor, floor_number)
     )
     monsters: List[Entity] = get_entities_at_random(
-        enemy_chances, number_of_monsters, floor_number
+        enemy_chances, number_of_monsters, floor_number, rng
     )
     items: List[Entity] = get_entities_at_random(
-        item_chance, number_of_items, floor_number
+        item_chance, number_of_items, floor_number, rng
     )
 
     for entity in monsters:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
         # Check if the entity is overlapping the existing entity first before placing it.
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
+        if not is_occupied(dungeon, x, y):
             entity.spawn_copy(dungeon, x, y)
     
     max_item_for_floor = get_max_value_for_floor(max_items_for_floor_by_floor, floor_number)
     for entity in items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
         # Check if the entity is overlapping the existing entity first before placing it.
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities) and ITEM_COUNT < max_item_for_floor:
-            ITEM_COUNT += 1
+        if not is_occupied(dungeon, x, y) and item_count < max_item_for_floor:
+            item_count += 1
             entity.spawn_copy(dungeon, x, y)
+    return item_count
 
-def place_entities_in_special_room(room: RectangularRoom, dungeon: GameMap, type: int) -> None:
+def place_entities_in_special_room(room: RectangularRoom, dungeon: GameMap, type: int, rng: random.Random) -> None:
     """spawn entites in special room"""
     for entity, (entity_x, entity_y) in special_room_attribute[type[0]][4]:
-        if not any(entity.x == entity_x and entity.y == entity_y for entity in dungeon.entities):
+        # A range is a random position along that axis.
+        if isinstance(entity_x, range):
+            entity_x = rng.choice(entity_x)
+        if isinstance(entity_y, range):
+            entity_y = rng.choice(entity_y)
+        if not is_occupied(dungeon, room.x1 + entity_x, room.y1 + entity_y):
             entity.spawn_copy(dungeon, room.x1 + entity_x, room.y1 + entity_y)
     for tile, (x,y) in special_room_attribute[type[0]][5]:
-        dungeon.tiles[(room.x1 + x,room.y1 + y)] = tile
+        dungeon.set_tiles((room.x1 + x,room.y1 + y), tile)
 
 def generate_dungeon(
         max_rooms: int, room_min_size: int, room_max_size: int,
-        map_width: int, map_height: int, engine: Engine,
+        map_width: int, map_height: int, engine: Engine, current_floor: int,
+        layout_rng: random.Random, spawn_rng: random.Random,
     ) -> GameMap:
-    """ Return The Generated Dungeon of given size. """
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    """
+    Return The Generated Dungeon of given size.
+    The player isn't placed, the place for it is given by the dungeon player_start.
+    This doesn't touch the engine state, so it can run in the background while the game goes on.
+    Rooms and tunnels are drawn from layout_rng, monsters and items from spawn_rng.
+    """
+    dungeon = GameMap(engine, map_width, map_height)
     rooms: List[RectangularRoom] = []
     center_of_last_room = (0, 0)
-    current_floor = engine.game_world.current_floor
     max_sp_room = get_max_value_for_floor(max_special_rooms_by_floor,current_floor)
     sp_room_count = 0
-    global ITEM_COUNT
-    ITEM_COUNT = 0
+    item_count = 0
     for r in range(max_rooms):
         #len(rooms) > 1 to fix that first and second rooms isn't special room
-        special_room = get_chance(current_floor,special_room_appear_chance) and len(rooms) > 1 and sp_room_count < max_sp_room
+        special_room = get_chance(current_floor,special_room_appear_chance,layout_rng) and len(rooms) > 1 and sp_room_count < max_sp_room
 
         if not special_room:
-            room_width = random.randint(room_min_size, room_max_size)
-            room_height = random.randint(room_min_size, room_max_size)
+            room_width = layout_rng.randint(room_min_size, room_max_size)
+            room_height = layout_rng.randint(room_min_size, room_max_size)
         else:
-            special_room_type = get_entities_at_random(special_room_type_chance, 1, current_floor)
-            room_width = random.randint(special_room_attribute[special_room_type[0]][0], special_room_attribute[special_room_type[0]][1])
-            room_height = random.randint(special_room_attribute[special_room_type[0]][2], special_room_attribute[special_room_type[0]][3])
+            special_room_type = get_entities_at_random(special_room_type_chance, 1, current_floor, layout_rng)
+            room_width = layout_rng.randint(special_room_attribute[special_room_type[0]][0], special_room_attribute[special_room_type[0]][1])
+            room_height = layout_rng.randint(special_room_attribute[special_room_type[0]][2], special_room_attribute[special_room_type[0]][3])
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = layout_rng.randint(0, dungeon.width - room_width - 1)
+        y = layout_rng.randint(0, dungeon.height - room_height - 1)
 
         new_room = RectangularRoom(x, y, room_width, room_height)
         
@@ -596,31 +613,32 @@ def generate_dungeon(
             continue  # This room intersects, so go to the next attempt.
 
         # No intersects, The Room is Valid, Dig out this rooms inner area.
-        dungeon.tiles[new_room.inner] = tile_types.floor
+        dungeon.set_tiles(new_room.inner, tile_types.floor)
         
         # Put the player in the center of the first room
         if len(rooms) == 0:
-            player.place_at(*new_room.center, dungeon)
+            dungeon.player_start = new_room.center
         else:
             # Dig out a tunnel between this room and the last one.
-            for x, y in make_tunnel_between(rooms[-1].center, new_room.center):
-                if dungeon.tiles[x, y] != tile_types.wall2:
-                    dungeon.tiles[x, y] = tile_types.floor
+            for x, y in make_tunnel_between(rooms[-1].center, new_room.center, layout_rng):
+                # Compare the raw bytes, a structured array comparison is slow.
+                if dungeon.tiles[x, y].tobytes() != WALL2_BYTES:
+                    dungeon.set_tiles((x, y), tile_types.floor)
             if not special_room:
                 center_of_last_room = new_room.center
 
         # Place the monsters in the Generated room.
         if special_room:
             sp_room_count += 1
-            place_entities_in_special_room(new_room, dungeon, special_room_type)
+            place_entities_in_special_room(new_room, dungeon, special_room_type, spawn_rng)
         else:
-            place_entities(new_room, dungeon, current_floor)
+            item_count = place_entities(new_room, dungeon, current_floor, item_count, spawn_rng)
         # Append the new room to the list.
         rooms.append(new_room)
     if current_floor != 20:
-        dungeon.tiles[center_of_last_room] = tile_types.up_stairs
+        dungeon.set_tiles(center_of_last_room, tile_types.up_stairs)
         dungeon.upstairs_location = center_of_last_room
     else:
-        dungeon.tiles[center_of_last_room] = tile_types.end_switch
+        dungeon.set_tiles(center_of_last_room, tile_types.end_switch)
         dungeon.endswitch_location = center_of_last_room
     return dungeon
@@ -15,7 +15,7 @@ import setup_game
 # Load the background image and remove the alpha channel.
 background_image = tcod.image.load("end_background.png")[:, :, :3]
 
-class EndScreen(input_handlers.BaseEventHandler):
+class EndScreen(input_handlers.StaticScreenHandler):
 
     pmax_hp :int
     pstr :int
@@ -31,7 +31,7 @@ class EndScreen(input_handlers.BaseEventHandler):
         self.pxp = pxp
         self.plv = plv
 
-    def on_render(self, console: tcod.console.Console) -> None:
+    def render_screen(self, console: tcod.console.Console) -> None:
         console.draw_semigraphics(background_image, 0, 0)
         console.print(
             console.width // 2,
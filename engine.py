@@ -1,60 +1,134 @@
 """ The Game Engine itself"""
 
 from __future__ import annotations
-import lzma
-import pickle
-from typing import  TYPE_CHECKING
+from typing import  Optional, Tuple, TYPE_CHECKING
 
+import numpy as np
+import tcod
 from tcod.console import Console
 
+from components import ai_component
+from entity import Actor
 import render_functions
 from message_log import MessageLog
+import savefile
 
 import exceptions
 
 from tcod.map import compute_fov
 
 if TYPE_CHECKING:
-    from entity import Actor
     from game_map import GameMap, GameWorld
 
 class Engine:
     game_map: GameMap
     game_world: GameWorld
     station_destroyed: bool = False
+    # (game map, player x, player y, tiles version) the visible array was last computed for.
+    _fov_key: Optional[Tuple[GameMap, int, int, int]] = None
+    # Window of the map the last FOV was computed in.
+    _fov_window: Optional[Tuple[slice, slice]] = None
+    # Distance field rooted at the player, shared by every chasing AI during one enemy turn.
+    _chase_map: Optional[np.ndarray] = None
 
     def __init__(self, player: Actor):
         self.message_log = MessageLog()
         self.player = player
         self.mouse_location = (0, 0)
 
+    def __getstate__(self) -> dict:
+        """ Drop the per-turn pathfinding cache, it is rebuilt on the next enemy turn. """
+        state = self.__dict__.copy()
+        state.pop("_chase_map", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # Everything in the save is unpickled by now, the entities included.
+        if self.game_map._index_stale:
+            self.game_map.rebuild_index()
+
+    @property
+    def chase_map(self) -> np.ndarray:
+        """
+        Return the distance field rooted at the player.
+        It is computed once on the first request of an enemy turn, then every chasing AI walks down the same field.
+        """
+        if self._chase_map is None:
+            distance = tcod.path.maxarray((self.game_map.width, self.game_map.height), order="F")
+            distance[self.player.x, self.player.y] = 0
+            tcod.path.dijkstra2d(distance, self.game_map.movement_cost(), 2, 3, out=distance)
+            self._chase_map = distance
+        return self._chase_map
+
     def save_as(self, filename: str) -> None:
-        """Save this Engine instance as a compressed file."""
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        """Save this Engine instance as a compressed file, see savefile for the format."""
+        savefile.save(self, filename)
 
     def handle_enemy_turn(self):
         """ Handle All the enemies turn action """
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
+        # The player only moves between enemy turns, so the chase map is valid for this whole turn.
+        self._chase_map = None
+        game_map = self.game_map
+        try:
+            # Only the actors whose turn is due act, see GameMap.pop_turn.
+            for due, entity in game_map.pop_turn():
+                if not isinstance(entity, Actor):
+                    # A scheduled event.
+                    entity()
+                    continue
+                if not entity.alive or entity is self.player:
+                    game_map.sleep(entity)
+                    continue
                 try:
                     entity.ai.perform()
                 except exceptions.Impossible:
-                    # Ignore ai that perform the Impossible action
-                    pass
-            else:
-                print(f'The {entity.name} wonders about all the thing it could do it if can take a real turn.')
+                    # Ignore ai that perform the Impossible action, they check their actions first so it's rare.
+                    ai_component.action_stats["raised"] += 1
+                finally:
+                    # Even if perform raised, the actor must not be left awake without a turn.
+                    # Sleep until woken up if there will be nothing to do next turn.
+                    if entity.ai is None or entity.ai.is_idle():
+                        game_map.sleep(entity)
+                    else:
+                        game_map.schedule_turn(entity, due)
+        finally:
+            self._chase_map = None
 
-    def update_fov(self) -> None:
+    def update_fov(self, radius: int = 8) -> None:
         """ Compute the visible area based on the players point of view. """
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=8,
+        game_map = self.game_map
+        x, y = self.player.x, self.player.y
+        key = (game_map, x, y, game_map.tiles_version)
+        if self._fov_key is not None and self._fov_key[0] is game_map and self._fov_key[1:] == key[1:]:
+            # Neither the player nor the tiles changed, the visible area is the same.
+            return
+        # Nothing outside the radius can be visible, so only compute the window around the player.
+        x0, y0 = max(0, x - radius), max(0, y - radius)
+        window = slice(x0, min(game_map.width, x + radius + 1)), slice(y0, min(game_map.height, y + radius + 1))
+        visible = compute_fov(
+            game_map.tiles["transparent"][window],
+            (x - x0, y - y0),
+            radius=radius,
         )
+        # Actors are only woken when they come into view, the ones that stay in view are awake already.
+        came_into_view = visible & ~game_map.visible[window]
+        # Clear the last visible area, or the whole map if the map has changed.
+        if self._fov_key is not None and self._fov_key[0] is game_map:
+            game_map.visible[self._fov_window] = False
+            game_map.mark_dirty(self._fov_window)
+        else:
+            came_into_view = visible
+            game_map.visible[:] = False
+            game_map.mark_dirty()
+        game_map.visible[window] = visible
         # If the tile is visible, add it to the "seen"
-        self.game_map.seen |= self.game_map.visible
+        game_map.seen[window] |= visible
+        for actor in game_map.get_actors_in_area(window, came_into_view):
+            game_map.wake(actor)
+        game_map.mark_dirty(window)
+        self._fov_key = key
+        self._fov_window = window
 
     def render(self, console: Console) -> None:
         """ Render the game """
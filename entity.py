@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import copy
 import math
 from typing import Optional, Type, Tuple, TypeVar, TYPE_CHECKING, Union
 
 from render_order import RenderOrder
+import util
 
 # Maybe use this, idk man.
 if TYPE_CHECKING:
@@ -31,7 +31,9 @@ class Entity:
     """
     # The parent is GameMap when on the ground, and is Inventory when this item is inventory.
     parent : Union[GameMap, Inventory]
-    
+    # Slots instead of a __dict__, floors hold a lot of entities.
+    __slots__ = ("parent", "x", "y", "char", "color", "name", "blocks_movement", "render_order")
+
     def __init__(
             self,
             parent: Optional[GameMap] = None,
@@ -55,31 +57,51 @@ class Entity:
 
         if parent:
             self.parent = parent
-            self.parent.entities.add(self)
+            self.parent.add_entity(self)
     
+    def __getstate__(self) -> tuple:
+        return util.get_slot_state(self)
+
+    def __setstate__(self, state) -> None:
+        util.set_slot_state(self, state)
+
     @property
     def game_map(self) -> GameMap:
         """ Return this entity parent game_map"""
         return self.parent.game_map
 
+    def clone(self: T) -> T:
+        """
+        Return a copy of this entity that isn't placed anywhere.
+        The copy is shallow, subclasses give it its own mutable components.
+        """
+        clone = util.copy_slots(self)
+        if hasattr(clone, "parent"):
+            del clone.parent
+        return clone
+
     def spawn_copy(self: T, game_map : GameMap, x : int, y : int):
         """ Spawn a copy of this instance at the given location on the game map. """
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = game_map
-        game_map.entities.add(clone)
+        game_map.add_entity(clone)
         return clone
 
     def place_at(self, x: int, y: int, game_map: Optional[GameMap] = None) -> None:
         """ Place this entity at the given location. """
-        self.x, self.y = x, y
         if game_map:
             if hasattr(self, "parent"):
                 if self.parent is self.game_map:
-                    self.game_map.entities.remove(self)
+                    self.game_map.remove_entity(self)
+            self.x, self.y = x, y
             self.parent = game_map
-            self.game_map.entities.add(self)
+            self.game_map.add_entity(self)
+        else:
+            self.x, self.y = x, y
+            if hasattr(self, "parent"):
+                self.game_map.update_entity(self)
 
     def distance(self, x: int, y: int) -> float:
         """Return the distance between the current entity and the given (x, y) coordinate."""
@@ -89,8 +111,12 @@ class Entity:
         # Move the entity by dx, dy.
         self.x += dx
         self.y += dy
+        # Keep the map spatial index in sync.
+        self.game_map.update_entity(self)
 
 class Actor(Entity):
+    __slots__ = ("ai", "equipment", "fighter", "inventory", "level", "item_drop_chance")
+
     def __init__(
             self,
             *,
@@ -129,12 +155,27 @@ class Actor(Entity):
         if self.fighter:
             self.inventory.capacity = 40 + max(self.fighter.get_stat_mods(self.fighter.strength) * 15, 0)
 
+    def clone(self) -> Actor:
+        """
+        Return an unplaced copy of this actor with its own fighter, level, inventory, equipment and ai.
+        The equipped items are shared with this actor, they're never changed while equipped by a monster.
+        """
+        clone = super().clone()
+        clone.ai = type(self.ai)(clone) if self.ai else None
+        clone.equipment = self.equipment.clone(clone)
+        clone.fighter = self.fighter.clone(clone)
+        clone.inventory = self.inventory.clone(clone)
+        clone.level = self.level.clone(clone)
+        return clone
+
     @property
     def alive(self):
         """ Return True if entity is still alive. """
         return bool(self.ai)
     
 class Item(Entity):
+    __slots__ = ("weight", "staackable", "consumable", "equippable")
+
     def __init__(
             self,
             *,
@@ -169,3 +210,13 @@ class Item(Entity):
 
         if self.equippable:
             self.equippable.parent = self
+
+    def clone(self) -> Item:
+        """
+        Return an unplaced copy of this item.
+        The consumable is copied since it acts on its item, the equippable stats are shared.
+        """
+        clone = super().clone()
+        if self.consumable:
+            clone.consumable = self.consumable.clone(clone)
+        return clone
@@ -10,3 +10,7 @@ class Impossible(Exception):
 class QuitWithoutSaving(SystemExit):
     """Can be raised to exit the game without automatically saving."""
     pass
+
+class CorruptSave(Exception):
+    """Raised when a save file fails its checks, the reason is given as the exception message."""
+    pass
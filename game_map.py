@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import heapq
+import random
+import traceback
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING, Union
 
 import numpy as np
 from tcod.console import Console
 from components.ai_component import StaticEnemy
+from components.fighter_component import NORMAL_SPEED
 
+from render_order import RenderOrder
 import tile_types
+from util import RandomStreams
 
 from entity import Actor, Item
 
@@ -17,20 +25,117 @@ if TYPE_CHECKING:
     from entity import Entity
 
 
+# Extra pathfinding cost of a cell for each entity blocking it.
+# A lower number will make the enemies crowd together
+# A higher number will make the enemies try to surround the play
+BLOCKER_COST = 10
+
+# Ticks of the game clock in a turn, the time an actor of NORMAL_SPEED takes to act.
+TURN_TIME = 100
+
+
+@functools.lru_cache(maxsize=None)
+def _disc_mask(radius: float) -> np.ndarray:
+    """ Return a square mask of the cells within radius of its center cell. """
+    reach = int(radius)
+    dx, dy = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+    mask = dx ** 2 + dy ** 2 <= radius ** 2
+    mask.flags.writeable = False
+    return mask
+
+
 class GameMap:
+    # True on a map saved before the spatial index or before actors could sleep, until Engine.__setstate__
+    # rebuilds it, see rebuild_index.
+    _index_stale: bool = False
+
     def __init__(self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()):
         self.width, self.height = width, height
         self.engine = engine
-        self.entities = set(entities)
+        # A dict used as an ordered set, so the entities always take their turns in the same order.
+        self.entities: Dict[Entity, None] = {}
+        # Spatial index of the entities on this map, keep in sync with add/remove/update_entity.
+        # Cell -> entities standing there, in the order they arrived.
+        self.entities_at: Dict[Tuple[int, int], List[Entity]] = {}
+        # Number of movement blocking entities on each cell.
+        self.blockers = np.zeros((width, height), dtype=np.int8, order="F")
+        # Entity -> the (x, y, blocks_movement, render_order) it was indexed with.
+        self._indexed: Dict[Entity, Tuple[int, int, bool, RenderOrder]] = {}
+        # Entities bucketed by RenderOrder (dicts used as ordered sets), so rendering needs no sorting.
+        self.render_buckets: Dict[RenderOrder, Dict[Entity, None]] = {order: {} for order in RenderOrder}
+        # Entity -> the order it was added to this map in, which is the order actors take their turns in.
+        self.arrival: Dict[Entity, int] = {}
+        self._next_arrival = 0
+        # The game clock in ticks, the start of the next turn.
+        self.time = 0
+        # A heap of (due time, order, sequence number, actor or event), see schedule_turn and schedule_event.
+        # Actors at the same time go in arrival order after the events, the sequence number breaks the ties.
+        self.schedule: List[Tuple[int, int, int, Union[Actor, Callable[[], None]]]] = []
+        self._next_sequence = 0
+        # The actors that take turns -> their next turn, an entry of the schedule for another time is stale.
+        self.awake: Dict[Actor, int] = {}
         # Create the map array and fill it with Wall.
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
         self.tiles[30:33, 22] = tile_types.wall
+        # The pathfinding cost of each cell, see movement_cost, and the tiles version it was computed from.
+        self.cost = np.zeros((width, height), dtype=np.int8, order="F")
+        self._cost_version = -1
+        for entity in entities:
+            self.add_entity(entity)
         # Tiles that are current visible.
         self.visible = np.full((width, height), fill_value=False, order="F")
         # Tiles that the player have seen
         self.seen = np.full((width, height), fill_value=False, order="F")
+        # Bumped on every tile change, so anything cached from the tiles knows to refresh.
+        self.tiles_version = 0
+        # The composed tile graphics from the last render, and the tiles version they were built from.
+        self._tile_layer: Optional[np.ndarray] = None
+        self._tile_layer_version = -1
+        # Regions of the tile layer that have to be recomposed on the next render.
+        self._dirty_regions: List[Tuple[slice, slice]] = []
         self.upstairs_location = (0, 0)
         self.endswitch_location = (0, 0)
+        # Where the player arrives on this floor.
+        self.player_start = (0, 0)
+
+    def __getstate__(self) -> dict:
+        """ Drop the render cache and the cost array, they are rebuilt after loading. """
+        state = self.__dict__.copy()
+        state["_tile_layer"] = None
+        state["_dirty_regions"] = []
+        state.pop("cost", None)
+        state.pop("_cost_version", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if "entities_at" not in state:
+            # Saved before the spatial index, when the entities were a set. The player refers back to this map
+            # so it may not be unpickled yet, the index is rebuilt once the whole save is.
+            self.entities = dict.fromkeys(self.entities)
+            self._index_stale = True
+        # Saved before the tiles were versioned.
+        self.tiles_version = state.get("tiles_version", 0)
+        # Never saved (see __getstate__), or saved before the tile layer was cached.
+        self._tile_layer = None
+        self._tile_layer_version = -1
+        self._dirty_regions = []
+        if "awake" not in state:
+            # Saved before actors could sleep, rebuild_index wakes them all.
+            self.arrival = {entity: i for i, entity in enumerate(self.entities)}
+            self._next_arrival = len(self.arrival)
+            self.awake = {}
+            self._index_stale = True
+        if "schedule" not in state:
+            # Saved before the schedule, the awake actors are due now.
+            self.time = 0
+            self.schedule = []
+            self._next_sequence = 0
+            for actor in list(self.awake):
+                self._push(0, self.arrival[actor], actor)
+                self.awake[actor] = 0
+        self.cost = np.zeros((self.width, self.height), dtype=np.int8, order="F")
+        self._cost_version = -1
 
     @property
     def game_map(self) -> GameMap:
@@ -47,17 +152,169 @@ class GameMap:
         """" Iterate over this maps items. """
         yield from(entity for entity in self.entities if isinstance(entity, Item))
 
+    def set_tiles(self, index, tile: np.ndarray) -> None:
+        """ Set the tiles at index (anything that can index the tiles array) to the given tile. """
+        self.tiles[index] = tile
+        self.tiles_version += 1
+
+    def add_entity(self, entity: Entity) -> None:
+        """ Add an entity to this map and its spatial index. """
+        if entity in self._indexed:
+            # Already on this map, just move it in the index.
+            self._unindex(entity)
+        else:
+            self.arrival[entity] = self._next_arrival
+            self._next_arrival += 1
+        self.entities[entity] = None
+        self._index(entity)
+        if isinstance(entity, Actor):
+            self.wake(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """ Remove an entity from this map and its spatial index. """
+        del self.entities[entity]
+        self._unindex(entity)
+        del self.arrival[entity]
+        self.awake.pop(entity, None)
+
+    def wake(self, actor: Actor) -> None:
+        """ Let actor take turns again from the next turn, until it's idle. Static props never take turns. """
+        if actor not in self.awake and actor.alive and not isinstance(actor.ai, StaticEnemy):
+            self.awake[actor] = self.time
+            self._push(self.time, self.arrival[actor], actor)
+
+    def sleep(self, actor: Actor) -> None:
+        """ Stop giving actor turns, until something wakes it. """
+        self.awake.pop(actor, None)
+
+    def _push(self, due: int, order: int, item: Union[Actor, Callable[[], None]]) -> None:
+        heapq.heappush(self.schedule, (due, order, self._next_sequence, item))
+        self._next_sequence += 1
+
+    def schedule_turn(self, actor: Actor, last: int) -> None:
+        """ Give actor its next turn, after the time its speed takes from its last turn. """
+        due = last + TURN_TIME * NORMAL_SPEED // actor.fighter.speed
+        self.awake[actor] = due
+        self._push(due, self.arrival[actor], actor)
+
+    def schedule_event(self, turns: int, event: Callable[[], None]) -> None:
+        """
+        Call event at the start of the given number of turns from the next one, before the actors act.
+        The event is pickled with the map, so it has to be a function or a bound method.
+        """
+        self._push(self.time + turns * TURN_TIME, -1, event)
+
+    def pop_turn(self) -> Iterator[Tuple[int, Union[Actor, Callable[[], None]]]]:
+        """
+        Move the clock on by a turn and yield (due time, actor or event) for what is due in it, in order.
+        An actor given its next turn before the end of this one comes again, anything else woken or scheduled
+        meanwhile waits for the next turn.
+        """
+        end = self.time + TURN_TIME
+        self.time = end
+        schedule = self.schedule
+        while schedule and schedule[0][0] < end:
+            due, _, _, item = heapq.heappop(schedule)
+            if isinstance(item, Actor) and self.awake.get(item) != due:
+                # Slept or rescheduled since.
+                continue
+            yield due, item
+
+    def rebuild_index(self) -> None:
+        """
+        Index every entity on this map from scratch, and wake every actor.
+        The idle ones go back to sleep after their next turn.
+        """
+        self.entities_at = {}
+        self.blockers = np.zeros((self.width, self.height), dtype=np.int8, order="F")
+        self._indexed = {}
+        self.render_buckets = {order: {} for order in RenderOrder}
+        for entity in self.entities:
+            self._index(entity)
+            if isinstance(entity, Actor):
+                self.wake(entity)
+        self._index_stale = False
+
+    def update_entity(self, entity: Entity) -> None:
+        """ Re-index an entity after its position, blocks_movement or render_order changed. """
+        if entity in self._indexed:
+            self._unindex(entity)
+            self._index(entity)
+
+    def _index(self, entity: Entity) -> None:
+        x, y, blocks, order = entity.x, entity.y, entity.blocks_movement, entity.render_order
+        self._indexed[entity] = (x, y, blocks, order)
+        self.entities_at.setdefault((x, y), []).append(entity)
+        self.render_buckets[order][entity] = None
+        if blocks:
+            self.blockers[x, y] += 1
+            if self.cost[x, y]:
+                self.cost[x, y] += BLOCKER_COST
+
+    def _unindex(self, entity: Entity) -> None:
+        x, y, blocks, order = self._indexed.pop(entity)
+        del self.render_buckets[order][entity]
+        cell = self.entities_at[x, y]
+        cell.remove(entity)
+        if not cell:
+            del self.entities_at[x, y]
+        if blocks:
+            self.blockers[x, y] -= 1
+            if self.cost[x, y]:
+                self.cost[x, y] -= BLOCKER_COST
+
+    def get_entities_at(self, x: int, y: int) -> Tuple[Entity, ...]:
+        """ Return all the entities at given location. """
+        return tuple(self.entities_at.get((x, y), ()))
+
     def is_in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
     
     def get_actor_at(self, x: int, y: int) -> Optional[Actor]:
         """ Return An Actor at given location. """
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.entities_at.get((x, y), ()):
+            if isinstance(entity, Actor) and entity.alive:
+                return entity
         return None
 
+    def get_area_in_radius(self, x: int, y: int, radius: float) -> Tuple[Tuple[slice, slice], np.ndarray]:
+        """
+        Return the window of this map around (x, y) as a 2D index, and a mask of the cells in it within radius.
+        The window is cut to the map edges.
+        """
+        reach = int(radius)
+        x1, y1 = max(x - reach, 0), max(y - reach, 0)
+        x2, y2 = min(x + reach + 1, self.width), min(y + reach + 1, self.height)
+        # The disc is centered on (x, y), move it by how much the window was cut on the top left.
+        dx, dy = x1 - (x - reach), y1 - (y - reach)
+        mask = _disc_mask(radius)[dx:dx + max(x2 - x1, 0), dy:dy + max(y2 - y1, 0)]
+        return (slice(x1, x2), slice(y1, y2)), mask
+
+    def get_cells_in_radius(self, x: int, y: int, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """ Return the x and y coordinate arrays of the cells on this map within radius of (x, y). """
+        window, mask = self.get_area_in_radius(x, y, radius)
+        xs, ys = np.nonzero(mask)
+        return xs + window[0].start, ys + window[1].start
+
+    def get_actors_in_radius(self, x: int, y: int, radius: float) -> List[Actor]:
+        """ Return the living actors within radius of (x, y). """
+        return self.get_actors_in_area(*self.get_area_in_radius(x, y, radius))
+
+    def get_actors_in_area(self, window: Tuple[slice, slice], mask: np.ndarray) -> List[Actor]:
+        """
+        Return the living actors on the cells of window where mask is True.
+        Living actors always block movement, so only the cells the blockers array marks are looked at.
+        """
+        xs, ys = np.nonzero(mask & (self.blockers[window] > 0))
+        actors = []
+        for cell in zip((xs + window[0].start).tolist(), (ys + window[1].start).tolist()):
+            actors.extend(
+                entity for entity in self.entities_at.get(cell, ())
+                if isinstance(entity, Actor) and entity.alive
+            )
+        return actors
+
     def get_nearest_enemy_pos(self, player_x, player_y):
         """ Return a Nearest enemy."""
         min_distance = float("inf")
@@ -72,33 +329,74 @@ class GameMap:
 
     def get_blocking_entity_at(self, x: int, y: int) -> Optional[Entity]:
         """ Return the blocking entity and given location """
-        for entity in self.entities:
-            if entity.blocks_movement and entity.x == x and entity.y == y:
+        for entity in self.entities_at.get((x, y), ()):
+            if entity.blocks_movement:
                 return entity
         return None
 
+    def movement_cost(self) -> np.ndarray:
+        """
+        Return the pathfinding cost array of this map, zero is blocked.
+        It's the same array every time, the spatial index keeps it up to date as blockers come and go, and it's
+        computed again in place after the tiles changed. Don't modify it.
+        """
+        if self._cost_version != self.tiles_version:
+            # Walkable cells cost 1, plus BLOCKER_COST for each entity blocking them. Walls are 0 (blocked).
+            np.multiply(self.blockers, BLOCKER_COST, out=self.cost)
+            self.cost += 1
+            self.cost *= self.tiles["walkable"]
+            self._cost_version = self.tiles_version
+        return self.cost
+
+    def mark_dirty(self, region: Optional[Tuple[slice, slice]] = None) -> None:
+        """
+        Tell the renderer that visible or seen changed inside region.
+        Without a region the whole tile layer is recomposed.
+        """
+        if region is None:
+            self._tile_layer = None
+        elif self._tile_layer is not None:
+            self._dirty_regions.append(region)
+
     def render(self, console: Console) -> None:
         """ 
         Render the map to console.
         If tiles is in "visible" array, draw it with its light color.
         If tiles is in "seen" array but not in "visible", draw it with its dark color.
         Otherwise draw the tile with UNSEEN.
+        The composed tiles are cached, only the regions marked dirty since the last render are recomposed.
         """
-        console.rgb[0:self.width, 0:self.height] = np.select(
-            condlist=[self.visible, self.seen],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.UNSEEN
-        )
-
-        sorted_entities = sorted(self.entities, key=lambda x: x.render_order.value)
-
-        for entity in sorted_entities:
-            # Only draw the entities that are in the FOV 
-            if self.visible[entity.x, entity.y]:
-                console.print(entity.x, entity.y, entity.char, fg=entity.color)
+        if self._tile_layer is None or self._tile_layer_version != self.tiles_version:
+            self._tile_layer = np.select(
+                condlist=[self.visible, self.seen],
+                choicelist=[self.tiles["light"], self.tiles["dark"]],
+                default=tile_types.UNSEEN
+            )
+            self._tile_layer_version = self.tiles_version
+        else:
+            for region in self._dirty_regions:
+                self._tile_layer[region] = np.select(
+                    condlist=[self.visible[region], self.seen[region]],
+                    choicelist=[self.tiles["light"][region], self.tiles["dark"][region]],
+                    default=tile_types.UNSEEN
+                )
+        self._dirty_regions.clear()
+        console.rgb[0:self.width, 0:self.height] = self._tile_layer
+
+        # Draw the buckets in RenderOrder, so actors end up on top of items and corpses.
+        for bucket in self.render_buckets.values():
+            for entity in bucket:
+                # Only draw the entities that are in the FOV 
+                if self.visible[entity.x, entity.y]:
+                    console.print(entity.x, entity.y, entity.char, fg=entity.color)
+# Worker that generates the next floor while the current one is played, created on first use.
+_floor_generator: Optional[ThreadPoolExecutor] = None
+
 class GameWorld:
    """
    Holds the settings for the GameMap, and generates new maps when moving down the stairs.
+   The next floor is generated in the background as soon as a floor is entered, when pregenerate is True.
+   All the randomness of a game comes from the seed, a random one is picked when it isn't given.
    """
 
    def __init__(
@@ -110,7 +408,9 @@ class GameWorld:
        max_rooms: int,
        room_min_size: int,
        room_max_size: int,
-       current_floor: int = 0
+       current_floor: int = 0,
+       pregenerate: bool = True,
+       seed: Optional[int] = None,
    ):
        self.engine = engine
 
@@ -124,16 +424,83 @@ class GameWorld:
 
        self.current_floor = current_floor
 
-   def generate_floor(self) -> None:
-       from dungen import generate_dungeon
+       if seed is None:
+           seed = random.getrandbits(32)
+       self.seed = seed
+       self.rng = RandomStreams(seed)
 
-       self.current_floor += 1
+       self.pregenerate = pregenerate
+       # The floor being generated in the background and its future GameMap.
+       self._next_floor: Optional[Tuple[int, Future]] = None
+
+   def __getstate__(self) -> dict:
+       """ Don't save the floor being generated, it's started again after loading. """
+       state = self.__dict__.copy()
+       state["_next_floor"] = None
+       return state
+
+   def __setstate__(self, state: dict) -> None:
+       self.__dict__.update(state)
+       # Saved before floors were generated in the background.
+       if "pregenerate" not in state:
+           self.pregenerate = True
+           self._next_floor = None
+       # Saved before the game had a seed, it goes on with a new one.
+       if "seed" not in state:
+           self.seed = random.getrandbits(32)
+           self.rng = RandomStreams(self.seed)
+
+   def _generate(self, floor: int) -> GameMap:
+       from dungen import generate_dungeon
 
-       self.engine.game_map = generate_dungeon(
+       return generate_dungeon(
            max_rooms=self.max_rooms,
            room_min_size=self.room_min_size,
            room_max_size=self.room_max_size,
            map_width=self.map_width,
            map_height=self.map_height,
            engine=self.engine,
+           current_floor=floor,
+           layout_rng=self.rng.layout(floor),
+           spawn_rng=self.rng.spawns(floor),
        )
+
+   def pregenerate_next_floor(self) -> None:
+       """ Start generating the floor after the current one in the background. """
+       global _floor_generator
+       # Floor 20 is the last one, it has the self destruct switch instead of stairs.
+       if not self.pregenerate or self.current_floor >= 20:
+           return
+       if _floor_generator is None:
+           _floor_generator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="floor-generator")
+       self._next_floor = (self.current_floor + 1, _floor_generator.submit(self._generate, self.current_floor + 1))
+
+   def _take_next_floor(self) -> Optional[GameMap]:
+       """ Return the pregenerated current floor, or None if it has to be generated now. """
+       if self._next_floor is None:
+           return None
+       floor, future = self._next_floor
+       self._next_floor = None
+       if floor != self.current_floor:
+           future.cancel()
+           return None
+       if future.cancel():
+           # The worker never got to it, generate it here instead.
+           return None
+       try:
+           # Already generated, or being generated, which is quicker to wait for than starting over.
+           return future.result()
+       except Exception:
+           traceback.print_exc()
+           return None
+
+   def generate_floor(self) -> None:
+       self.current_floor += 1
+
+       game_map = self._take_next_floor()
+       if game_map is None:
+           game_map = self._generate(self.current_floor)
+       self.engine.game_map = game_map
+       self.engine.player.place_at(*game_map.player_start, game_map)
+
+       self.pregenerate_next_floor()
@@ -0,0 +1,146 @@
+""" Run the game without a tcod window or audio, driven by a script or a bot, for CI and load testing. """
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+
+import audio
+
+# Has to happen before a sound is played, so no sound file is ever loaded.
+audio.use_null_backend()
+
+import tcod
+
+from actions import Action, BumpAction, EquipAction, ItemAction, PickUpAction, TakeStairsAction, WaitAction
+from components.ai_component import StaticEnemy
+from entity import Item
+import input_handlers
+import setup_game
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class InputSource:
+    """ Base class for the headless input sources, they play the part of the keyboard. """
+    def next_action(self, engine: Engine) -> Optional[Action]:
+        """ Return the next player action, or None to end the run. """
+        raise NotImplementedError()
+
+
+class ScriptedInput(InputSource):
+    """ Replay a fixed list of moves, a (dx, dy) bumps in that direction and None waits a turn. """
+    def __init__(self, moves: Iterable[Optional[Tuple[int, int]]]):
+        self.moves: Iterator[Optional[Tuple[int, int]]] = iter(moves)
+
+    def next_action(self, engine: Engine) -> Optional[Action]:
+        for move in self.moves:
+            if move is None:
+                return WaitAction(engine.player)
+            return BumpAction(engine.player, *move)
+        return None
+
+
+class BotInput(InputSource):
+    """
+    A simple bot: heal when hurt, attack anything next to it, pick up and wear what it finds,
+    otherwise head for the stairs.
+    """
+    def __init__(self, heal_below: float = 0.35):
+        self.heal_below = heal_below
+        # Distance field to the stairs of the current floor.
+        self._stairs_map: Optional[Tuple[GameMap, object]] = None
+
+    def next_action(self, engine: Engine) -> Optional[Action]:
+        player = engine.player
+        game_map = engine.game_map
+        if player.fighter.hp < player.fighter.max_hp * self.heal_below:
+            for item in player.inventory.items:
+                if item.name.startswith("Nano patch"):
+                    return ItemAction(player, item)
+        for dx, dy in DIRECTIONS:
+            actor = game_map.get_actor_at(player.x + dx, player.y + dy)
+            if actor and not isinstance(actor.ai, StaticEnemy):
+                return BumpAction(player, dx, dy)
+        for item in player.inventory.items:
+            if item.equippable and getattr(player.equipment, item.equippable.equipment_type.name.lower()) is None:
+                return EquipAction(player, item)
+        if player.inventory.total_weight < player.inventory.capacity and any(
+            isinstance(entity, Item) for entity in game_map.get_entities_at(player.x, player.y)
+        ):
+            return PickUpAction(player)
+        stairs = game_map.upstairs_location if engine.game_world.current_floor != 20 else game_map.endswitch_location
+        if (player.x, player.y) == stairs:
+            return TakeStairsAction(player)
+        if self._stairs_map is None or self._stairs_map[0] is not game_map:
+            distance = tcod.path.maxarray((game_map.width, game_map.height), order="F")
+            distance[stairs] = 0
+            tcod.path.dijkstra2d(distance, game_map.tiles["walkable"], 2, 3, out=distance)
+            self._stairs_map = (game_map, distance)
+        path = tcod.path.hillclimb2d(self._stairs_map[1], (player.x, player.y), True, True)
+        if len(path) > 1:
+            # Walking into a table or an item box attacks it, which clears the way.
+            return BumpAction(player, int(path[1][0]) - player.x, int(path[1][1]) - player.y)
+        return BumpAction(player, *random.choice(DIRECTIONS))
+
+
+def new_game(seed: Optional[int] = None) -> Engine:
+    """
+    Return a brand new game session, same as the main menu [N].
+    Floors are generated on the spot rather than in the background, which keeps the timings steady.
+    """
+    return setup_game.new_game(pregenerate=False, seed=seed)
+
+
+def run(engine: Engine, source: InputSource, turns: int) -> int:
+    """
+    Feed actions from source to the engine for up to the given number of attempts.
+    Level ups are taken automatically. Return the number of turns that were actually played.
+    """
+    handler = input_handlers.MainGameEventHandler(engine)
+    played = 0
+    for _ in range(turns):
+        if not engine.player.alive or engine.station_destroyed:
+            break
+        action = source.next_action(engine)
+        if action is None:
+            break
+        if handler.handle_action(action):
+            played += 1
+        level = engine.player.level
+        while level.requires_level_up:
+            level.increase_max_hp(int(engine.player.fighter.max_hp / 5) + 2)
+            level.increase_attack(2)
+    return played
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=1000, help="number of turns to attempt")
+    parser.add_argument("--seed", type=int, default=None, help="seed the games and the bot")
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    played = games = deepest = 0
+    start = time.perf_counter()
+    # Start a new game each time the bot dies or wins, until enough turns were played.
+    while played < args.turns:
+        engine = new_game(None if args.seed is None else args.seed + games)
+        turns = run(engine, BotInput(), args.turns - played)
+        games += 1
+        deepest = max(deepest, engine.game_world.current_floor)
+        if not turns:
+            break
+        played += turns
+    elapsed = time.perf_counter() - start
+    print(f"Played {played} turns over {games} games in {elapsed:.2f}s ({played / elapsed:.0f} turns/s), deepest floor {deepest}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,11 @@ import os
 
 from typing import Callable, Optional, Tuple, TYPE_CHECKING, Union
 
+import numpy as np
 import tcod.event
 
+import audio
+import autosave
 from actions import Action, BumpAction, WaitAction, PickUpAction, DropItemAction, TakeStairsAction, EquipAction, RangedAttackAction
 import components.item_pic 
 import colors
@@ -76,9 +79,34 @@ class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
     def on_render(self, console: tcod.console.Console) -> None:
         raise NotImplementedError()
 
+    def wants_redraw(self, event: tcod.event.Event) -> bool:
+        """ Return True if the screen has to be drawn again after this handler handled event. """
+        return True
+
     def ev_quit(self, event: tcod.event.Quit) -> Optional[Action]:
         raise SystemExit()
 
+class StaticScreenHandler(BaseEventHandler):
+    """
+    A screen that doesn't change, like a menu. It's drawn by render_screen once into an offscreen console,
+    which is then copied each frame, and only drawn again when the console changes size.
+    """
+    _screen: Optional[tcod.console.Console] = None
+
+    def render_screen(self, console: tcod.console.Console) -> None:
+        raise NotImplementedError()
+
+    def on_render(self, console: tcod.console.Console) -> None:
+        screen = self._screen
+        if screen is None or (screen.width, screen.height) != (console.width, console.height):
+            screen = self._screen = tcod.console.Console(console.width, console.height, order="F")
+            self.render_screen(screen)
+        screen.blit(console)
+
+    def wants_redraw(self, event: tcod.event.Event) -> bool:
+        """ Nothing changes on the screen until another handler takes over. """
+        return False
+
 class PopupMessage(BaseEventHandler):
     """Display a popup text window."""
 
@@ -132,6 +160,8 @@ class EventHandler(BaseEventHandler):
         if action is None:
             return False
 
+        # The same sound is only heard once in a turn, however many times it's played.
+        audio.new_turn()
         try:
             action.perform()
         except exceptions.Impossible as exc:
@@ -141,6 +171,7 @@ class EventHandler(BaseEventHandler):
         self.engine.handle_enemy_turn()
 
         self.engine.update_fov()
+        autosave.notify_turn(self.engine)
         return True
 
     def ev_mousemotion(self, event : tcod.event.MouseMotion) -> None:
@@ -389,6 +420,8 @@ class AreaRangedAttackHandler(SelectIndexHandler):
         self.radius = radius
         self.callback = callback
         self.color = color
+        # The cursor location and the cells of the area around it, only looked up again when the cursor moves.
+        self._area: Optional[Tuple[Tuple[int, int], Tuple[np.ndarray, np.ndarray]]] = None
 
     def on_render(self, console: tcod.Console) -> None:
         """Highlight the tile under the cursor."""
@@ -396,15 +429,14 @@ class AreaRangedAttackHandler(SelectIndexHandler):
 
         x, y = self.engine.mouse_location
 
-        # Draw a rectangle around the targeted area, so the player can see the affected tiles.
-        console.draw_frame(
-            x=x - self.radius - 1,
-            y=y - self.radius - 1,
-            width=self.radius ** 2,
-            height=self.radius ** 2,
-            fg=self.color,
-            clear=False,
-        )
+        if self._area is None or self._area[0] != (x, y):
+            self._area = ((x, y), self.engine.game_map.get_cells_in_radius(x, y, self.radius))
+        xs, ys = self._area[1]
+
+        # Tint the targeted area, so the player can see exactly which tiles are affected.
+        bg = console.rgb["bg"]
+        bg[xs, ys] = bg[xs, ys] // 2 + np.array(self.color, dtype=np.uint8) // 2
+        bg[x, y] = colors.white
 
     def on_index_selected(self, x: int, y: int) -> Optional[Action]:
         return self.callback((x, y))
@@ -448,6 +480,8 @@ class MainGameEventHandler(EventHandler):
         elif key == tcod.event.KeySym.h:
             for item in self.engine.player.inventory.items:
                 if item.name == "Nano patch":
+                    # A turn like any other action, see handle_action.
+                    audio.new_turn()
                     try:
                         item.consumable.activate(Action(self.engine.player))
                         self.engine.handle_enemy_turn()
@@ -476,6 +510,8 @@ class MainGameEventHandler(EventHandler):
 class GameOverEventHandler(EventHandler):
     def on_quit(self) -> None:
         """Handle exiting out of a finished game."""
+        # Make sure no autosave brings the save file back.
+        autosave.discard()
         if os.path.exists("savegame.sav"):
             os.remove("savegame.sav")  # Deletes the active save file.
         raise exceptions.QuitWithoutSaving()  # Avoid saving a finished game.
@@ -488,12 +524,30 @@ class GameOverEventHandler(EventHandler):
             self.on_quit()
     
 class MessageLogHistoryViewer(EventHandler):
-    """ Print the message log history on a larger window which can be navigated. """
+    """
+    Print the message log history on a larger window which can be navigated.
+    The blocks of the history older than the log are read as the cursor reaches the top.
+    """
     def __init__(self, engine: Engine) -> None:
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        engine.message_log.load_older()
+        self.messages = list(engine.message_log.messages)
+        # Number of history blocks not read yet, the newest of them is read next.
+        self.history_left = len(engine.message_log.history)
+        self.log_length = len(self.messages)
         self.cursor = self.log_length - 1
 
+    def page_in(self) -> bool:
+        """ Put the next history block in front of the messages, return False if none are left. """
+        if not self.history_left:
+            return False
+        self.history_left -= 1
+        block = self.engine.message_log.read_history_block(self.history_left)
+        self.messages[:0] = block
+        self.log_length = len(self.messages)
+        self.cursor += len(block)
+        return True
+
     def on_render(self, console: tcod.console.Console) -> None:
         super().on_render(console)  # Draw the main state as the background.
         log_console = tcod.console.Console(console.width - 6, console.height - 6)
@@ -507,7 +561,8 @@ class MessageLogHistoryViewer(EventHandler):
             1,
             log_console.width - 2,
             log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+            self.messages,
+            last=self.cursor,
         )
         log_console.blit(console, 3, 3)
 
@@ -515,6 +570,8 @@ class MessageLogHistoryViewer(EventHandler):
         # Fancy conditional movement to make it feel right.
         if event.sym in CURSOR_Y_KEYS:
             adjust = CURSOR_Y_KEYS[event.sym]
+            while self.cursor + adjust < 0 and self.page_in():
+                pass
             if adjust < 0 and self.cursor == 0:
                 # Only move from the top to the bottom when you're on the edge.
                 self.cursor = self.log_length - 1
@@ -525,6 +582,8 @@ class MessageLogHistoryViewer(EventHandler):
                 # Otherwise move while staying clamped to the bounds of the history log.
                 self.cursor = max(0, min(self.cursor + adjust, self.log_length - 1))
         elif event.sym == tcod.event.KeySym.HOME:
+            while self.page_in():
+                pass
             self.cursor = 0  # Move directly to the top message.
         elif event.sym == tcod.event.KeySym.END:
             self.cursor = self.log_length - 1  # Move directly to the last message.
@@ -1,9 +1,14 @@
 """ Main Game Entry Point (PutTeamNameHere)"""
 
+import time
+
 import tcod
 
+import audiobrain
+import autosave
 import exceptions
 import input_handlers
+import render_functions
 import setup_game
 
 import traceback
@@ -12,6 +17,8 @@ import colors
 def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
     """If the current event handler has an active Engine then save it."""
     if isinstance(handler, input_handlers.EventHandler):
+        # Let the autosave finish first, they write to the same file.
+        autosave.flush()
         handler.engine.save_as(filename)
         print("Game saved.")
 
@@ -26,6 +33,9 @@ def main() -> None:
         "newtile16x16.png", 16, 16, tcod.tileset.CHARMAP_CP437
     )
 
+    autosave.enable("savegame.sav")
+    # Load the common sound effects while the menu is up.
+    audiobrain.warm_up()
     handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
     with tcod.context.new(
         width=window_width,
@@ -36,17 +46,39 @@ def main() -> None:
         vsync=True,
     ) as context:
         root_console = tcod.console.Console(screen_width, screen_height, order="F")
+        frame_counter = render_functions.FrameCounter()
+        # The bytes of the last presented frame, None to force presenting the next one.
+        last_frame = None
+        # Whether the events since the last frame may have changed the screen.
+        redraw = True
         # main game loop here
         try: 
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                if redraw:
+                    frame_start = time.perf_counter()
+                    root_console.clear()
+                    handler.on_render(console=root_console)
+                    # Don't present the frame if it's identical to the one already on screen.
+                    # Compared as bytes, much faster than comparing the structured array field by field.
+                    frame = root_console.rgb.tobytes()
+                    presented = frame != last_frame
+                    if presented:
+                        context.present(root_console)
+                        last_frame = frame
+                    frame_counter.add(time.perf_counter() - frame_start, presented)
+                redraw = False
                 try:
                     for event in tcod.event.wait():
                         context.convert_event(event)
-                        handler = handler.handle_events(event)
+                        if isinstance(event, tcod.event.WindowEvent):
+                            # The window was resized or exposed, it has to be presented again.
+                            last_frame = None
+                            redraw = True
+                        next_handler = handler.handle_events(event)
+                        redraw = redraw or next_handler is not handler or next_handler.wants_redraw(event)
+                        handler = next_handler
                 except Exception:  # Handle exceptions in game.
+                    redraw = True
                     traceback.print_exc()  # Print error to stderr.
                     # Then print the error to the message log.
                     if isinstance(handler, input_handlers.EventHandler):
@@ -61,6 +93,8 @@ def main() -> None:
         except BaseException:  # Save on any other unexpected exception.
             save_game(handler, "savegame.sav")
             raise
+        finally:
+            print(frame_counter.summary())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
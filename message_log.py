@@ -1,27 +1,85 @@
 """ Define The Player Message log """
 
-from typing import Iterable, List ,Reversible, Tuple
+from collections import deque
+import itertools
+import pickle
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Reversible, Tuple
 import textwrap
+import zlib
 
 import tcod
 import colors
 
+# Number of messages kept in the log, the older ones are compressed into its history.
+MESSAGE_LOG_CAP = 1000
+
 class Message:
+    # Width -> (full text, its wrapped lines), filled by MessageLog.wrap_message.
+    _wrapped: Optional[Dict[int, Tuple[str, List[str]]]] = None
+
     def __init__(self, text: str, fg: Tuple[int, int, int]) -> None:
         self.text = text
         self.fg = fg
         self.count = 1
 
+    def __getstate__(self) -> dict:
+        """ Don't save the wrapped lines, they are cheap to make again. """
+        state = self.__dict__.copy()
+        state.pop("_wrapped", None)
+        return state
+
     @property
     def full_text(self) -> str:
         """ The full text of this message (including the count in some message). """
         if self.count > 1:
             return f"{self.text} x{self.count}"
         return self.text
+
+def pack_messages(messages: Iterable[Message]) -> bytes:
+    """ Return the messages pickled as (text, fg, count) records, see unpack_messages. """
+    return pickle.dumps([(message.text, message.fg, message.count) for message in messages], protocol=pickle.HIGHEST_PROTOCOL)
+
+def unpack_messages(data: bytes) -> List[Message]:
+    """ Return the messages pickled by pack_messages. """
+    messages = []
+    for text, fg, count in pickle.loads(data):
+        message = Message(text, fg)
+        message.count = count
+        messages.append(message)
+    return messages
     
 class MessageLog:
-    def __init__(self) -> None:
-        self.messages : List[Message] = []
+    """
+    The latest messages of the game, at most cap of them (plus a little slack) are kept.
+    Older ones are compressed into the history, a block for each spill, which is saved with the game.
+    """
+    cap: int = MESSAGE_LOG_CAP
+    # Number of messages moved out to the history, or dropped by saves from before it.
+    spilled: int = 0
+    # Returns the messages older than those in the log, which a loaded save left for later, see load_older.
+    _older: Optional[Callable[[], List[Message]]] = None
+
+    def __init__(self, cap: int = MESSAGE_LOG_CAP) -> None:
+        self.messages : Deque[Message] = deque()
+        self.cap = cap
+        # The messages moved out of the log, oldest first, as zlib compressed pack_messages blocks.
+        self.history: List[bytes] = []
+
+    def __getstate__(self) -> dict:
+        self.load_older()
+        state = self.__dict__.copy()
+        state.pop("_older", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # Saves from before the cap kept every message in a list.
+        self.messages = deque(self.messages)
+        # Saves from before the history dropped the spilled messages, or wrote them to a file.
+        if "history" not in state:
+            self.history = []
+        self.__dict__.pop("history_path", None)
+        self.spill()
 
     def add_message(
             self,
@@ -39,6 +97,42 @@ class MessageLog:
             self.messages[-1].count += 1
         else:
             self.messages.append(Message(text=text, fg=fg))
+            # Spill in batches, so the history is made of blocks worth compressing.
+            if len(self.messages) > self.cap + self.cap // 10:
+                self.spill()
+
+    def defer_older(self, older: Callable[[], List[Message]]) -> None:
+        """ Leave the messages older than those in the log to be returned by older when they are needed. """
+        self._older = older
+
+    def load_older(self) -> None:
+        """ Put the messages left by defer_older back at the start of the log. """
+        if self._older is None:
+            return
+        older, self._older = self._older, None
+        self.messages.extendleft(reversed(older()))
+        self.spill()
+
+    def spill(self) -> None:
+        """ Move the messages over the cap out of the log, into a new block of the history. """
+        self.load_older()
+        excess = len(self.messages) - self.cap
+        if excess <= 0:
+            return
+        old = [self.messages.popleft() for _ in range(excess)]
+        self.spilled += excess
+        self.history.append(zlib.compress(pack_messages(old)))
+
+    def read_history_block(self, block: int) -> List[Message]:
+        """ Return the messages of the given block of the history. """
+        return unpack_messages(zlib.decompress(self.history[block]))
+
+    def read_history(self) -> Iterator[Message]:
+        """ Iterate over the messages in the history, oldest first. """
+        # The messages a loaded save left for later may spill into the history.
+        self.load_older()
+        for block in range(len(self.history)):
+            yield from self.read_history_block(block)
 
     def render(
             self,
@@ -57,6 +151,18 @@ class MessageLog:
         for line in text.splitlines():
             yield from textwrap.wrap(line, width=width, expand_tabs=True)
 
+    @classmethod
+    def wrap_message(cls, message: Message, width: int) -> List[str]:
+        """ Return the lines of the message wrapped to width, they are only wrapped again when the text changes. """
+        if message._wrapped is None:
+            message._wrapped = {}
+        full_text = message.full_text
+        cached = message._wrapped.get(width)
+        if cached is None or cached[0] != full_text:
+            cached = (full_text, list(cls.wrap_text(full_text, width)))
+            message._wrapped[width] = cached
+        return cached[1]
+
     @classmethod
     def render_messages(
         cls,
@@ -66,16 +172,21 @@ class MessageLog:
         width : int,
         height : int,
         messages : Reversible[Message],
+        last : Optional[int] = None,
     ) -> None:
         """
         Render the messages provided.
         The "messages" are rendered starting at the last message and working backwards to the first message.
+        If last is given, rendering starts at the message with that index instead.
         """
         y_offset = height - 1
 
-        for message in reversed(messages):
-            for line in reversed(list(cls.wrap_text(message.full_text, width))):
+        newest_first = reversed(messages)
+        if last is not None:
+            newest_first = itertools.islice(newest_first, len(messages) - 1 - last, None)
+        for message in newest_first:
+            for line in reversed(cls.wrap_message(message, width)):
                 console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
                 y_offset -= 1
                 if y_offset < 0:
-                    return  # No more space to print messages.
\ No newline at end of file
+                    return  # No more space to print messages.
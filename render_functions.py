@@ -15,6 +15,29 @@ if TYPE_CHECKING:
 
 wrapper = textwrap.TextWrapper(width=34, max_lines=3, placeholder="...")
 
+class FrameCounter:
+    """ Count the frames the main loop renders, how many were presented and the time spent on them. """
+    def __init__(self) -> None:
+        self.rendered = 0
+        self.presented = 0
+        self.frame_time = 0.0
+
+    def add(self, frame_time: float, presented: bool) -> None:
+        """ Record one rendered frame. """
+        self.rendered += 1
+        self.presented += presented
+        self.frame_time += frame_time
+
+    @property
+    def skipped(self) -> int:
+        """ Return the number of frames that were identical to the last one and not presented. """
+        return self.rendered - self.presented
+
+    def summary(self) -> str:
+        """ Return a one line report of the counted frames. """
+        average = self.frame_time / self.rendered * 1000 if self.rendered else 0.0
+        return f"Frames: {self.rendered} rendered, {self.presented} presented, {self.skipped} skipped, {average:.2f} ms average."
+
 def render_progress_bars(
         console : Console,
         current : int,
@@ -35,7 +58,7 @@ def get_names_at_location(x : int, y : int, game_map : GameMap) -> str:
     if not game_map.is_in_bounds(x, y) or not game_map.visible[x, y]:
         return ""
 
-    names = ", ".join(entity.name for entity in game_map.entities if entity.x == x and entity.y == y)
+    names = ", ".join(entity.name for entity in game_map.get_entities_at(x, y))
 
     return names.capitalize()
 
@@ -0,0 +1,287 @@
+"""
+The save file format.
+
+A save file is a header, then chunks, then an index of the chunks:
+    header: MAGIC, the offset and length of the index, and the digest of the index.
+    chunks: each one compressed on its own, at an offset aligned to CHUNK_ALIGN.
+    index: a pickled dict of chunk name -> IndexEntry.
+The engine is one chunk, pickled without the map arrays and the message log. The tile, visible and seen
+arrays are stored as their raw buffers, and the messages in blocks of MESSAGE_BLOCK by their position in the run.
+The history of the message log is stored a chunk per block, which never change once written.
+
+Loading is quick whatever the length of the run: only the newest messages are read back right away, the older
+ones wait until the message log needs them.
+
+Saving again over a save file only appends the chunks that changed, then a new index, and only then points
+the header at the new index, so the file is valid if the game dies while saving. Once the file holds more
+dead chunks than live ones, it is written again from scratch to a temporary file that replaces it.
+
+Saving is done in two phases, capture() has to run while nothing changes the game, but its snapshot can be
+written with write() on another thread.
+"""
+
+from __future__ import annotations
+
+import bz2
+import hashlib
+import io
+import lzma
+import os
+import pickle
+import struct
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+import exceptions
+from message_log import Message, pack_messages, unpack_messages
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+MAGIC = b"RLHSAVE1"
+# MAGIC, index offset, index length, index digest.
+HEADER = struct.Struct("<8sQQ16s")
+CHUNK_ALIGN = 64
+MESSAGE_BLOCK = 100
+
+# Codec name -> (compress, decompress).
+CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "none": (bytes, bytes),
+    "zlib": (lambda data: zlib.compress(data, 1), zlib.decompress),
+    "bz2": (lambda data: bz2.compress(data, 9), bz2.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+DEFAULT_CODEC = "zlib"
+
+# The arrays of the current GameMap stored as raw buffers.
+MAP_ARRAYS = ("tiles", "visible", "seen")
+# Number of the newest message blocks read when loading, enough to fill the message log on screen.
+LOADED_MESSAGE_BLOCKS = 2
+
+
+class Chunk(NamedTuple):
+    """ The uncompressed data of a chunk, and what is needed to read it back. """
+    data: bytes
+    # (dtype, shape) for a raw array, None for a pickle.
+    meta: Any = None
+
+
+class IndexEntry(NamedTuple):
+    offset: int
+    length: int
+    codec: str
+    digest: bytes
+    meta: Any
+
+
+def digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class _EnginePickler(pickle.Pickler):
+    """ Pickles an Engine, leaving out the objects that are stored in their own chunks. """
+    def __init__(self, file: io.BytesIO, external: Dict[int, str]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.external = external
+
+    def persistent_id(self, obj: Any) -> Optional[str]:
+        return self.external.get(id(obj))
+
+
+class _EngineUnpickler(pickle.Unpickler):
+    """ Unpickles an Engine, reading the objects stored in their own chunks through load. """
+    def __init__(self, file: io.BytesIO, load: Callable[[str], Any]):
+        super().__init__(file)
+        self.load_external = load
+
+    def persistent_load(self, pid: str) -> Any:
+        return self.load_external(pid)
+
+
+def capture(engine: Engine) -> Dict[str, Chunk]:
+    """ Return a snapshot of the engine as uncompressed chunks, nothing in it is shared with the game. """
+    game_map = engine.game_map
+    message_log = engine.message_log
+    message_log.load_older()
+    chunks: Dict[str, Chunk] = {}
+    external: Dict[int, str] = {}
+
+    for name in MAP_ARRAYS:
+        array = getattr(game_map, name)
+        chunks[f"map/{name}"] = Chunk(array.tobytes(order="F"), (array.dtype, array.shape))
+        external[id(array)] = f"map/{name}"
+
+    # Blocks are numbered by the position of their messages in the whole run, not in the log,
+    # so a block doesn't change when older messages are spilled, until its own messages are.
+    first = message_log.spilled
+    messages = list(message_log.messages)
+    blocks = []
+    for start in range(first - first % MESSAGE_BLOCK, first + len(messages), MESSAGE_BLOCK):
+        block = messages[max(start - first, 0):start + MESSAGE_BLOCK - first]
+        chunks[f"messages/{start // MESSAGE_BLOCK}"] = Chunk(pack_messages(block))
+        blocks.append(start // MESSAGE_BLOCK)
+    chunks["messages"] = Chunk(pickle.dumps(blocks))
+    external[id(message_log.messages)] = "messages"
+
+    for block, data in enumerate(message_log.history):
+        chunks[f"history/{block}"] = Chunk(data)
+    chunks["history"] = Chunk(pickle.dumps(len(message_log.history)))
+    external[id(message_log.history)] = "history"
+
+    buffer = io.BytesIO()
+    _EnginePickler(buffer, external).dump(engine)
+    chunks["engine"] = Chunk(buffer.getvalue())
+    return chunks
+
+
+def read_index(f: io.BufferedIOBase) -> Optional[Dict[str, IndexEntry]]:
+    """ Return the index of the save file f, or None if it isn't in this format. """
+    f.seek(0)
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size or not header.startswith(MAGIC):
+        return None
+    _, offset, length, index_digest = HEADER.unpack(header)
+    f.seek(offset)
+    data = f.read(length)
+    if len(data) != length or digest(data) != index_digest:
+        raise exceptions.CorruptSave("The save file index is damaged.")
+    return pickle.loads(data)
+
+
+def _write_chunk(f: io.BufferedIOBase, chunk: Chunk, codec: str) -> IndexEntry:
+    """ Write the chunk at the end of f, aligned, and return its index entry. """
+    end = f.seek(0, os.SEEK_END)
+    offset = end + -end % CHUNK_ALIGN
+    f.seek(offset)
+    data = CODECS[codec][0](chunk.data)
+    f.write(data)
+    return IndexEntry(offset, len(data), codec, digest(chunk.data), chunk.meta)
+
+
+def _write_index(f: io.BufferedIOBase, index: Dict[str, IndexEntry]) -> None:
+    """ Write the index at the end of f, then point the header at it. """
+    data = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    offset = f.seek(0, os.SEEK_END)
+    f.write(data)
+    f.flush()
+    os.fsync(f.fileno())
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, offset, len(data), digest(data)))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _write_new(filename: str, snapshot: Dict[str, Chunk], codec: str) -> None:
+    """ Write the snapshot into a new file, which then replaces filename. """
+    temp = filename + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, 0, bytes(16)))
+        index = {name: _write_chunk(f, chunk, codec) for name, chunk in snapshot.items()}
+        _write_index(f, index)
+    os.replace(temp, filename)
+
+
+def write(filename: str, snapshot: Dict[str, Chunk], codec: str = DEFAULT_CODEC) -> None:
+    """
+    Save a snapshot from capture() to filename.
+    If filename is already a save in this format, only the chunks that changed are added to it.
+    """
+    try:
+        f = open(filename, "r+b")
+    except FileNotFoundError:
+        return _write_new(filename, snapshot, codec)
+    with f:
+        try:
+            old_index = read_index(f)
+        except exceptions.CorruptSave:
+            old_index = None
+        if old_index is None:
+            f.close()
+            return _write_new(filename, snapshot, codec)
+
+        changed = [
+            name for name, chunk in snapshot.items()
+            if name not in old_index or old_index[name].digest != digest(chunk.data)
+        ]
+        live = sum(old_index[name].length for name in snapshot if name not in changed)
+        live += sum(len(snapshot[name].data) for name in changed)
+        # Written again when most of the file would be dead chunks, the new chunks are counted uncompressed
+        # so it may happen a bit early, which is fine.
+        if f.seek(0, os.SEEK_END) > 2 * live + 64 * 1024:
+            f.close()
+            return _write_new(filename, snapshot, codec)
+
+        index = {name: old_index[name] for name in snapshot if name not in changed}
+        for name in changed:
+            index[name] = _write_chunk(f, snapshot[name], codec)
+        _write_index(f, index)
+
+
+def save(engine: Engine, filename: str, codec: str = DEFAULT_CODEC) -> None:
+    """ Save the engine to filename. """
+    write(filename, capture(engine), codec)
+
+
+def _decode(name: str, entry: IndexEntry, data: bytes) -> bytes:
+    """ Return the uncompressed data of a chunk read from the file, after checking it. """
+    try:
+        data = CODECS[entry.codec][1](data)
+    except Exception as exc:
+        raise exceptions.CorruptSave(f"The save file chunk {name!r} can't be read: {exc}") from exc
+    if digest(data) != entry.digest:
+        raise exceptions.CorruptSave(f"The save file chunk {name!r} is damaged.")
+    return data
+
+
+def _parse_messages(blocks: List[bytes]) -> List[Message]:
+    """ Return the messages of the uncompressed message blocks. """
+    messages: List[Message] = []
+    for data in blocks:
+        messages.extend(unpack_messages(data))
+    return messages
+
+
+def load(filename: str) -> Engine:
+    """
+    Load an Engine from filename, saves from before this format (a pickled Engine compressed with LZMA) too.
+    An Engine saved by an older version of the game is brought up to date as it's unpickled: GameWorld and
+    GameMap fill in what they didn't have in their __setstate__, and Engine.__setstate__ finishes the GameMap
+    once every entity is unpickled, see GameMap.rebuild_index.
+    """
+    with open(filename, "rb") as f:
+        index = read_index(f)
+        if index is None:
+            f.seek(0)
+            return pickle.loads(lzma.decompress(f.read()))
+
+        def read_raw(name: str) -> bytes:
+            entry = index[name]
+            f.seek(entry.offset)
+            return f.read(entry.length)
+
+        def read(name: str) -> bytes:
+            return _decode(name, index[name], read_raw(name))
+
+        # The older message blocks are only read, they are checked and parsed when the log needs them.
+        older: List[Tuple[str, bytes]] = []
+
+        def load_external(name: str) -> Any:
+            if name == "messages":
+                blocks = [f"messages/{block}" for block in pickle.loads(read("messages"))]
+                split = max(len(blocks) - LOADED_MESSAGE_BLOCKS, 0)
+                older.extend((block, read_raw(block)) for block in blocks[:split])
+                return _parse_messages([read(block) for block in blocks[split:]])
+            if name == "history":
+                return [read(f"history/{block}") for block in range(pickle.loads(read("history")))]
+            dtype, shape = index[name].meta
+            return np.ndarray(shape, dtype=dtype, buffer=bytearray(read(name)), order="F")
+
+        engine = _EngineUnpickler(io.BytesIO(read("engine")), load_external).load()
+
+    if older:
+        engine.message_log.defer_older(
+            lambda: _parse_messages([_decode(name, index[name], data) for name, data in older])
+        )
+    return engine
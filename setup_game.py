@@ -1,36 +1,42 @@
 """Handle the loading and initialization of game sessions."""
 from __future__ import annotations
 
-import copy
-import lzma
-import pickle
 import traceback
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import tcod
 import libtcodpy
 
 import colors
-from engine import Engine
-import entity_factory
-from game_map import GameWorld
 import input_handlers
 
 import audiobrain
 
+if TYPE_CHECKING:
+    from engine import Engine
+
 # Load the background image and remove the alpha channel.
 background_image = tcod.image.load("menu_background.png")[:, :, :3]
 
 
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
+def new_game(pregenerate: bool = True, seed: Optional[int] = None) -> Engine:
+    """
+    Return a brand new game session as an Engine instance.
+    If pregenerate is True the next floor is generated in the background while the current one is played.
+    The same seed gives the same floors, a random one is used when it's None.
+    """
+    # Imported here so the main menu shows up without waiting for the game modules.
+    from engine import Engine
+    import entity_factory
+    from game_map import GameWorld
+
     map_width, map_height = 94, 43
 
     room_max_size = 10
     room_min_size = 6
     max_rooms = 30
 
-    player = copy.deepcopy(entity_factory.player)
+    player = entity_factory.player.clone()
 
     engine = Engine(player=player)
 
@@ -41,6 +47,8 @@ def new_game() -> Engine:
         room_max_size=room_max_size,
         map_width=map_width,
         map_height=map_height,
+        pregenerate=pregenerate,
+        seed=seed,
     )
     engine.game_world.generate_floor()
     engine.update_fov()
@@ -69,16 +77,19 @@ def new_game() -> Engine:
 
 def load_game(filename: str) -> Engine:
     """Load an Engine instance from a file."""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    from engine import Engine
+    import savefile
+
+    engine = savefile.load(filename)
     assert isinstance(engine, Engine)
+    engine.game_world.pregenerate_next_floor()
     return engine
 
-class MainMenu(input_handlers.BaseEventHandler):
+class MainMenu(input_handlers.StaticScreenHandler):
     """Handle the main menu rendering and input."""
     # main_menu_snd : audio.AudioPlayBack = None
 
-    def on_render(self, console: tcod.console.Console) -> None:
+    def render_screen(self, console: tcod.console.Console) -> None:
         """Render the main menu on a background image."""
         console.draw_semigraphics(background_image, 0, 0)
         console.print(
@@ -118,12 +129,16 @@ class MainMenu(input_handlers.BaseEventHandler):
                     (20, 50), (37, 4), (55, 40),]
         for x,y in star_pos:
             console.print(x,y,"☻",fg=colors.white)
+
+    def on_render(self, console: tcod.console.Console) -> None:
+        super().on_render(console)
         # play the main menu sound
         # if not self.main_menu_snd:
             # self.main_menu_snd = audio.AudioPlayBack("sounds/scifimain.mp3", True)
         # if not self.main_menu_snd.playback.playing:
             # self.main_menu_snd.play()
-        if not audiobrain.main_bgm.playback.playing:
+        # Checked without loading the music, it's loaded on the audio thread by play().
+        if not audiobrain.main_bgm.playing:
             audiobrain.main_bgm.play()
 
     def ev_keydown(
@@ -1,14 +1,82 @@
 """ Game Utility Functions """
 
+import functools
 import random
+from typing import Tuple, TypeVar
 
-def roll_dice(dcount: int, dside: int, dplus) -> int:
+T = TypeVar("T")
+
+# Marks a slot that isn't set in a pickled state, Ellipsis pickles as a singleton.
+_UNSET = ...
+
+class RandomStreams:
+    """
+    Independent random number generators derived from one seed, so a run can be played again.
+    The layout and spawns of a floor only depend on the seed and the floor number,
+    so a floor comes out the same no matter what happened before it, or when it's generated.
+    """
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.loot = random.Random(f"{seed}:loot")
+        self.combat = random.Random(f"{seed}:combat")
+
+    def layout(self, floor: int) -> random.Random:
+        """ Return the generator for the rooms and tunnels of the given floor. """
+        return random.Random(f"{self.seed}:layout:{floor}")
+
+    def spawns(self, floor: int) -> random.Random:
+        """ Return the generator for the monsters and items of the given floor. """
+        return random.Random(f"{self.seed}:spawns:{floor}")
+
+@functools.lru_cache(maxsize=None)
+def slot_names(cls: type) -> Tuple[str, ...]:
+    """ Return the names of the __slots__ of cls and all its bases. """
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return tuple(names)
+
+def get_slot_state(obj: object) -> tuple:
+    """
+    Return the pickle state of an object with __slots__: the slot names, their values and the __dict__ if any.
+    The names tuple is the same object for the whole class, so pickle only writes it once.
+    """
+    names = slot_names(type(obj))
+    values = tuple(getattr(obj, name, _UNSET) for name in names)
+    return names, values, getattr(obj, "__dict__", None) or None
+
+def set_slot_state(obj: object, state) -> None:
+    """ Restore a state from get_slot_state, or a plain dict pickled before the class had __slots__. """
+    if isinstance(state, dict):
+        attributes = state.items()
+    else:
+        names, values, extra = state
+        attributes = [*zip(names, values), *(extra or {}).items()]
+    for name, value in attributes:
+        if value is not _UNSET:
+            setattr(obj, name, value)
+
+def copy_slots(obj: T) -> T:
+    """ Return a shallow copy of an object with __slots__, without going through the pickle protocol like copy.copy. """
+    clone = object.__new__(type(obj))
+    for name in slot_names(type(obj)):
+        try:
+            setattr(clone, name, getattr(obj, name))
+        except AttributeError:
+            # Not set on obj.
+            pass
+    if hasattr(obj, "__dict__"):
+        clone.__dict__.update(obj.__dict__)
+    return clone
+
+def roll_dice(dcount: int, dside: int, dplus, rng: random.Random = random) -> int:
     """ Return a rolled number from given dice parameters. """
     total = dplus
     for i in range(dcount):
-        total +=random.randint(0, dside)
+        total +=rng.randint(0, dside)
     return total
 
-def hit_check(t_ac: int, p_tohit: int) -> bool:
+def hit_check(t_ac: int, p_tohit: int, rng: random.Random = random) -> bool:
     """ Return True if the will attack hit the target. """
-    return roll_dice(1, 20, p_tohit) >= t_ac
\ No newline at end of file
+    return roll_dice(1, 20, p_tohit, rng) >= t_ac